@@ -1,60 +1,152 @@
 """Aigües de l'Horta integration."""
 import asyncio
 import logging
-from datetime import timedelta
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from .const import DOMAIN, PLATFORMS
-from .aigues_horta_api import AiguesHortaAPI
+from .const import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_MAX_RESET_TIMEOUT, BREAKER_RESET_TIMEOUT,
+    CONF_BASE_URL, CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY, DOMAIN, FLOW_CLIENT_TTL,
+    HISTORY_COMPACT_INTERVAL, HISTORY_DB_FILE, HISTORY_RETENTION_DAYS,
+    PLATFORMS, REFRESH_JITTER, SCHEDULER_BURST, SCHEDULER_MAX_CONCURRENCY,
+    SCHEDULER_RATE, STORAGE_VERSION,
+)
+from .aigues_horta_api import BASE_URL, AiguesHortaAsyncAPI
+from .backfill import AiguesHortaBackfill
+from .coordinator import AiguesHortaCoordinator
+from .history import HourlyHistoryStore
+from .scheduler import CircuitBreaker, RefreshScheduler, RequestGate
+from .services import async_setup_services
+from .websocket import async_setup_websocket
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Aigües de l'Horta component."""
-    hass.data.setdefault(DOMAIN, {})
+    domain_data = _async_domain_data(hass) # Request gate and breaker (maybe already made by a config flow)
+
+    # Shared on-disk hourly history for all entries
+    history = HourlyHistoryStore(hass.config.path(HISTORY_DB_FILE))
+    domain_data["history"] = history
+
+    # Refresh phasing for all entries
+    domain_data["scheduler"] = RefreshScheduler(hass, REFRESH_JITTER)
+
+    async def _async_compact_history(_now=None):
+        await hass.async_add_executor_job(history.compact, HISTORY_RETENTION_DAYS)
+
+    async def _async_close_history(_event):
+        await hass.async_add_executor_job(history.close)
+
+    async_track_time_interval(hass, _async_compact_history, HISTORY_COMPACT_INTERVAL)
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_history)
+
+    await async_setup_services(hass)
+    async_setup_websocket(hass)
     return True
 
+@callback
+def _async_domain_data(hass: HomeAssistant) -> dict:
+    """Return the integration's shared data, creating the request gate and breaker on first use.
+
+    A config flow may need them before async_setup has run (first entry of the integration).
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if "request_gate" not in domain_data:
+        # Shared request gate (rate/concurrency cap) for all entries
+        domain_data["request_gate"] = RequestGate(SCHEDULER_MAX_CONCURRENCY, SCHEDULER_RATE, SCHEDULER_BURST)
+        # One breaker for the portal: an outage pauses every entry
+        domain_data["breaker"] = CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT)
+    return domain_data
+
+@callback
+def async_create_api(hass: HomeAssistant, data: dict, options: dict | None = None) -> AiguesHortaAsyncAPI:
+    """Create the API client of an account (config entry data) on the shared gate and breaker."""
+    domain_data = _async_domain_data(hass)
+    base_url = data.get(CONF_BASE_URL, BASE_URL)
+    # Own cookie jar per entry, on HA's shared connector pool
+    return AiguesHortaAsyncAPI(
+        data["username"], data["password"], async_create_clientsession(hass),
+        max_concurrency=(options or {}).get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+        request_gate=domain_data["request_gate"],
+        base_url=base_url,
+        breaker=domain_data["breaker"] if base_url == BASE_URL else None, # Another portal gets its own breaker
+    )
+
+@callback
+def async_stash_flow_client(hass: HomeAssistant, api: AiguesHortaAsyncAPI) -> None:
+    """Keep a client the config flow just logged in, for the entry setup that follows."""
+    flow_clients = hass.data.setdefault(DOMAIN, {}).setdefault("flow_clients", {})
+    now = time.monotonic()
+    for key, (stale, stashed) in list(flow_clients.items()): # Never taken (setup failed or flow abandoned)
+        if now - stashed > FLOW_CLIENT_TTL.total_seconds(): del flow_clients[key]; _async_discard_flow_client(hass, stale)
+    if previous := flow_clients.get((api.username, api.base_url)): _async_discard_flow_client(hass, previous[0])
+    flow_clients[(api.username, api.base_url)] = (api, now)
+
+@callback
+def async_take_flow_client(hass: HomeAssistant, data: dict) -> AiguesHortaAsyncAPI | None:
+    """Return (once) the client stashed by the config flow for this account, if still fresh."""
+    key = (data["username"], data.get(CONF_BASE_URL, BASE_URL).rstrip('/'))
+    api, stashed = hass.data.get(DOMAIN, {}).get("flow_clients", {}).pop(key, (None, 0.0))
+    if api is None: return None
+    if time.monotonic() - stashed > FLOW_CLIENT_TTL.total_seconds(): _async_discard_flow_client(hass, api); return None
+    return api
+
+@callback
+def _async_discard_flow_client(hass: HomeAssistant, api: AiguesHortaAsyncAPI) -> None:
+    """Close the session of a stashed client that will not be used (made for it by async_create_api)."""
+    hass.async_create_task(api.async_close(given_session=True), f"{DOMAIN} close unused flow client")
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Aigües de l'Horta from a config entry."""
-    
-    username = entry.data["username"]
-    password = entry.data["password"]
-    
-    api = AiguesHortaAPI(username, password)
-    
-    try:
-        await hass.async_add_executor_job(api.login)
-    except Exception as err:
-        _LOGGER.error("Error logging in Aigües de l'Horta: %s", err)
-        return False
-
-    async def async_update_data():
-        """Fetch data from API."""
+    # A new entry reuses the client its config flow logged in (cookies, p_auth and contracts)
+    flow_api = async_take_flow_client(hass, entry.data)
+    api = flow_api or async_create_api(hass, entry.data, entry.options)
+    coordinator = AiguesHortaCoordinator(hass, entry, api, hass.data[DOMAIN].get("history"))
+
+    # Resume incremental fetching from the persisted high-water mark; entities start
+    # from the last stored result and the login + first live poll run in the background
+    if await coordinator.async_load_state():
+        entry.async_create_background_task(hass, coordinator.async_start(flow_api is not None), f"{DOMAIN} first refresh")
+    else: # Nothing to show yet: wait for the portal
         try:
-            return await hass.async_add_executor_job(api.get_consumption_data)
+            # Reuses the stored session cookies when still valid
+            await coordinator.async_authenticate(logged_in=flow_api is not None)
+            # Fetch initial data
+            await coordinator.async_config_entry_first_refresh()
+        except UpdateFailed as err: # Portal down or flaky: let HA retry the setup with backoff
+            await api.async_close(given_session=True)
+            raise ConfigEntryNotReady(f"Aigües de l'Horta portal unavailable: {err}") from err
+        except ConfigEntryAuthFailed: # Credentials rejected: HA starts the reauth flow
+            await api.async_close(given_session=True)
+            raise
         except Exception as err:
-            _LOGGER.error("Error fetching Aigües de l'Horta data: %s", err)
-            raise UpdateFailed(f"Error fetching data: {err}")
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=async_update_data,
-        update_interval=timedelta(hours=1),
-    )
-
-    # Fetch initial data
-    await coordinator.async_config_entry_first_refresh()
+            await api.async_close(given_session=True)
+            if isinstance(err, ConfigEntryNotReady): raise # From the first refresh
+            _LOGGER.error("Error logging in Aigües de l'Horta: %s", err)
+            return False
     
+    backfill = AiguesHortaBackfill(hass, entry.entry_id, coordinator)
     hass.data[DOMAIN][entry.entry_id] = {
         "api": api,
         "coordinator": coordinator,
+        "backfill": backfill,
     }
 
+    # Continue a backfill interrupted by a restart
+    await backfill.async_resume()
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    entry.async_on_unload(hass.data[DOMAIN]["scheduler"].async_register(entry.entry_id, coordinator))
+
     # Set up all platforms for this device/entry
     for platform in PLATFORMS:
         hass.async_create_task(
@@ -63,6 +155,10 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload the entry when its options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload Aigües de l'Horta config entry."""
     # Unload entities for this entry/device
@@ -77,6 +173,27 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     # Remove config entry from domain
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["backfill"].async_cancel()
+        await entry_data["api"].async_close(given_session=True) # Per-entry session (async_create_clientsession)
 
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove persisted data when the config entry is deleted."""
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+    # The entry's rows in the shared history store (keys as in AiguesHortaCoordinator.history_key),
+    # unless another entry polls the same contract
+    if (history := hass.data.get(DOMAIN, {}).get("history")) is not None:
+        state = await store.async_load() or {}
+        keys = {key or entry.entry_id for key in state.get("contracts", {})} | {entry.entry_id}
+        in_use = {
+            entry_data["coordinator"].history_key(key)
+            for entry_data in hass.data[DOMAIN].values() if isinstance(entry_data, dict) and "coordinator" in entry_data
+            for key in entry_data["coordinator"].contract_keys
+        }
+        for key in keys - in_use: await hass.async_add_executor_job(history.remove_contract, key)
+    await store.async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.backfill").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.fetched").async_remove()
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.session").async_remove()
@@ -0,0 +1,120 @@
+"""Running consumption totals per calendar period, updated row by row (no rescans)."""
+import logging
+from collections import deque
+from datetime import date, datetime, timedelta, tzinfo
+
+_LOGGER = logging.getLogger(__name__)
+
+PERIOD_TODAY = "today"
+PERIOD_YESTERDAY = "yesterday"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+PERIOD_LAST_24H = "last_24h"
+PERIODS = (PERIOD_TODAY, PERIOD_YESTERDAY, PERIOD_WEEK, PERIOD_MONTH, PERIOD_LAST_24H)
+
+_DAY = timedelta(days=1)
+
+
+def week_start(day: date) -> date:
+    """Return the Monday of the day's week."""
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    """Return the first day of the day's month."""
+    return day.replace(day=1)
+
+
+def seed_start(today: date) -> date:
+    """Return the first day whose rows are needed to rebuild every period of `today`."""
+    return min(today - _DAY, week_start(today), month_start(today))
+
+
+class PeriodTotals:
+    """Consumption of one contract per day, week and month plus the last 24 hours.
+
+    Rows must arrive oldest first (older or repeated hours are ignored); each one
+    updates every total in O(1). Periods are keyed by their first local day, so the
+    portal's naive wall-clock hours roll over at local midnight whatever the DST
+    offset, while the 24-hour window spans 24 real hours across DST changes. Only
+    the current and previous key of each period are kept.
+    """
+
+    __slots__ = ("_tz", "newest", "_days", "_weeks", "_months", "_window", "_window_sum")
+
+    def __init__(self, tz: tzinfo) -> None:
+        """Initialize empty totals; `tz` is the zone of the portal's wall-clock hours."""
+        self._tz = tz
+        self.newest: datetime | None = None # Newest hour added
+        self._days = {} # First day of the period -> m³
+        self._weeks = {}
+        self._months = {}
+        self._window = deque() # (UTC timestamp, m³) of the last 24 hours
+        self._window_sum = 0.0
+
+    def _timestamp(self, hour: datetime) -> float:
+        return hour.replace(tzinfo=self._tz).timestamp()
+
+    @staticmethod
+    def _bump(totals: dict, key: date, consumption: float) -> None:
+        if key not in totals:
+            totals[key] = 0.0
+            if len(totals) > 2: del totals[min(totals)] # Keep the current and previous period only
+        totals[key] += consumption
+
+    def add(self, hour: datetime, consumption: float | None) -> bool:
+        """Add the consumption of the hour starting at `hour`; returns False if it was not newer."""
+        if self.newest is not None and hour <= self.newest: return False
+        self.newest = hour
+        if consumption is None: return True
+        day = hour.date()
+        self._bump(self._days, day, consumption)
+        self._bump(self._weeks, week_start(day), consumption)
+        self._bump(self._months, month_start(day), consumption)
+        stamp = self._timestamp(hour)
+        self._window.append((stamp, consumption)); self._window_sum += consumption
+        while self._window[0][0] <= stamp - 24 * 3600: self._window_sum -= self._window.popleft()[1]
+        return True
+
+    def add_rows(self, rows) -> int:
+        """Add (datetime, consumption, reading) rows, oldest first; returns how many were new."""
+        return sum(self.add(hour, consumption) for hour, consumption, *_ in rows)
+
+    def _total(self, totals: dict, key: date, newest_key: date | None):
+        if key in totals: return round(totals[key], 6)
+        if newest_key is not None and key > newest_key: return 0.0 # Period started, nothing published yet
+        return None # Unknown (before the first row or dropped)
+
+    def total(self, period: str, today: date):
+        """Return the m³ of a period relative to the local date `today` (None if unknown)."""
+        newest_day = self.newest.date() if self.newest else None
+        if period == PERIOD_TODAY: return self._total(self._days, today, newest_day)
+        if period == PERIOD_YESTERDAY: return self._total(self._days, today - _DAY, newest_day)
+        if period == PERIOD_WEEK: return self._total(self._weeks, week_start(today), newest_day and week_start(newest_day))
+        if period == PERIOD_MONTH: return self._total(self._months, month_start(today), newest_day and month_start(newest_day))
+        if period == PERIOD_LAST_24H: return round(max(self._window_sum, 0.0), 6) if self.newest else None
+        raise ValueError(f"Unknown period {period}")
+
+    def as_dict(self) -> dict:
+        """Return the totals as a JSON-serializable dict (for HA storage)."""
+        iso = lambda totals: {key.isoformat(): value for key, value in totals.items()}
+        return {
+            "newest": self.newest.isoformat() if self.newest else None,
+            "days": iso(self._days), "weeks": iso(self._weeks), "months": iso(self._months),
+            "window": [[stamp, consumption] for stamp, consumption in self._window],
+        }
+
+    @classmethod
+    def from_dict(cls, tz: tzinfo, stored: dict) -> "PeriodTotals | None":
+        """Rebuild totals saved by as_dict; None if the data is invalid."""
+        totals = cls(tz)
+        try:
+            totals.newest = datetime.fromisoformat(stored["newest"]) if stored.get("newest") else None
+            for name in ("days", "weeks", "months"):
+                getattr(totals, f"_{name}").update({date.fromisoformat(k): float(v) for k, v in stored.get(name, {}).items()})
+            totals._window.extend((float(stamp), float(consumption)) for stamp, consumption in stored.get("window", []))
+            totals._window_sum = sum(consumption for _, consumption in totals._window)
+        except (KeyError, TypeError, ValueError, AttributeError) as err:
+            _LOGGER.warning("Ignoring invalid stored period totals: %s", err)
+            return None
+        return totals
@@ -1,12 +1,34 @@
 """API for Aigües de l'Horta using Direct API Call."""
+import asyncio
+import codecs
+import contextlib
+import hashlib
 import logging
 import re
-import requests
 import json
 from datetime import datetime, timedelta, date
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlencode
-import locale
+from urllib.parse import urljoin
+import time
+from http.cookies import SimpleCookie
+
+import aiohttp
+from yarl import URL
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD, BREAKER_MAX_RESET_TIMEOUT, BREAKER_RESET_TIMEOUT, CONTRACTS_CACHE_TTL,
+    CONTRACTS_RETRY_DELAY, DEFAULT_MAX_CONCURRENCY, REQUEST_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+)
+from .decoder import ConsumosStream, decode_consumos
+from .metrics import (
+    COUNTER_BYTES, COUNTER_NEW_ROWS, COUNTER_RELOGINS, COUNTER_REQUESTS, COUNTER_RETRIES, COUNTER_ROWS,
+    PHASE_CONSUMPTION_PAGE, PHASE_CONTRACTS, PHASE_HOURLY_API, PHASE_LOGIN, PHASE_LOGIN_PAGE,
+    PHASE_LOGIN_POST, PHASE_P_AUTH_PARSE, PHASE_PROCESS_ROWS, PollMetrics,
+)
+from .scheduler import CircuitBreaker, CircuitOpenError, backoff_delay
+from .series import HourlySeries
+from .parser import (
+    contracts_fragment, extract_login_form, extract_login_form_soup, find_p_auth, find_p_auth_soup, login_p_auth,
+)
 
 # Home Assistant specific exceptions
 from homeassistant.exceptions import ConfigEntryAuthFailed
@@ -15,264 +37,740 @@ from homeassistant.helpers.update_coordinator import UpdateFailed
 _LOGGER = logging.getLogger(__name__)
 
 BASE_URL = "https://www.aigueshorta.es"
-LOGIN_URL = f"{BASE_URL}/login"
-# URL de la página HTML principal de consumos (para obtener p_auth fresco)
-CONSUMO_PAGE_URL = f"{BASE_URL}/es/group/aigues-de-l-horta/mis-consumos"
-# URL directa de la API JSON de consumo horario (es la misma base URL)
-HOURLY_API_URL = f"{BASE_URL}/es/group/aigues-de-l-horta/mis-consumos"
-
-class AiguesHortaAPI:
-    """API Client for Aigües de l'Horta (Direct API Call Method)."""
+LOGIN_PATH = "/login"
+# Página HTML principal de consumos (para obtener p_auth fresco)
+CONSUMO_PAGE_PATH = "/es/group/aigues-de-l-horta/mis-consumos"
+# API JSON de consumo horario (es la misma ruta)
+HOURLY_API_PATH = CONSUMO_PAGE_PATH
+CONTRACTS_PATH = "/es/group/aigues-de-l-horta/contratos"
+LOGIN_URL = f"{BASE_URL}{LOGIN_PATH}"
+CONSUMO_PAGE_URL = f"{BASE_URL}{CONSUMO_PAGE_PATH}"
+HOURLY_API_URL = f"{BASE_URL}{HOURLY_API_PATH}"
+CONTRACTS_URL = f"{BASE_URL}{CONTRACTS_PATH}"
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36',
+    'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7', # Default for page load
+    'accept-language': 'es-ES,es;q=0.9',
+}
+PAGE_ACCEPT = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+API_ACCEPT = 'application/json, text/javascript, */*; q=0.01'
+API_PAGE_SIZE = 200 # Rows per buscarConsumosHoraria call (_MisConsumos_inicio/_MisConsumos_fin)
+API_MAX_PAGES = 50 # Safety stop when paging a range
+STREAM_CHUNK_SIZE = 64 * 1024 # Bytes read at a time when streaming API pages
+P_AUTH_TTL = timedelta(hours=6) # Reuse a p_auth this long before reloading the consumption page
+CONTRACT_PARAM = '_MisConsumos_contrato' # Selects the supply point of a multi-contract account
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504}) # Retried with backoff
+CONTRACT_CONTAINER_TAGS = ['div', 'li', 'article', 'section', 'tr']
+CONTRACT_CLASS_RE = re.compile(r'contract|contrato|poliza', re.I)
+CONTRACT_LABEL_RE = re.compile(r'N(?:º|umero)\s*d?e?\s*(?:Contrato|Póliza)', re.I)
+CONTRACT_NUMBER_RE = re.compile(CONTRACT_LABEL_RE.pattern + r'\s*[:\-]?\s*(\d+)', re.I)
+CONTRACT_ADDRESS_RE = re.compile(r'(?:Dirección|Ubicación|Emplazamiento|Localización)\s*Suministro?\s*[:\-]?\s*(.+)', re.I | re.S)
+CONTRACT_ADDRESS_CLASS_RE = re.compile(r'address|direccion|ubicacion', re.I)
+
+class ApiTokenRejected(UpdateFailed):
+    """The JSON API refused the p_auth token (401, login redirect or non-JSON answer)."""
+
+
+class SessionExpired(UpdateFailed):
+    """The portal redirected a logged-in page to the login form."""
+
+
+class PortalUnavailable(UpdateFailed):
+    """The portal could not be reached (network error, 5xx after retries or open circuit)."""
+
+
+class ContractSeries:
+    """Incremental fetch state of one contract: newest hour ingested plus the retained window."""
+
+    __slots__ = ("high_water_mark", "hourly_consumption", "latest_reading", "latest_reading_datetime", "new_rows", "fingerprint")
+
+    def __init__(self):
+        self.high_water_mark: datetime | None = None
+        self.hourly_consumption = {}
+        self.latest_reading = None
+        self.latest_reading_datetime: datetime | None = None
+        self.new_rows = [] # (datetime, consumption, reading) ingested by the last poll
+        self.fingerprint = None # Digest of the last processed API body
+
+    def as_dict(self):
+        return {
+            "high_water_mark": self.high_water_mark.isoformat() if self.high_water_mark else None,
+            "hourly_consumption": dict(self.hourly_consumption),
+            "latest_reading": self.latest_reading,
+            "latest_reading_datetime": self.latest_reading_datetime.isoformat() if self.latest_reading_datetime else None,
+            "fingerprint": self.fingerprint,
+        }
 
-    def __init__(self, username, password):
-        """Initialize the API client."""
+    @classmethod
+    def from_dict(cls, state):
+        series = cls()
+        hwm = state.get("high_water_mark"); reading_dt = state.get("latest_reading_datetime")
+        series.high_water_mark = datetime.fromisoformat(hwm) if hwm else None
+        series.hourly_consumption = dict(state.get("hourly_consumption") or {})
+        series.latest_reading = state.get("latest_reading")
+        series.latest_reading_datetime = datetime.fromisoformat(reading_dt) if reading_dt else None
+        series.fingerprint = state.get("fingerprint")
+        return series
+
+
+# Errors raised by aiohttp for network/HTTP problems (equivalent to requests' RequestException)
+REQUEST_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AiguesHortaAsyncAPI:
+    """Async API Client for Aigües de l'Horta (Direct API Call Method) on aiohttp."""
+
+    def __init__(self, username, password, session: aiohttp.ClientSession | None = None, max_concurrency=DEFAULT_MAX_CONCURRENCY, request_gate=None, base_url=BASE_URL, breaker=None):
+        """Initialize the API client.
+
+        `session` should be a session with its own cookie jar (e.g. from HA's
+        `async_create_clientsession`); if omitted one is created on first use.
+        `max_concurrency` caps the per-contract API calls running at once;
+        `request_gate` (a scheduler.RequestGate) is shared by all clients to cap
+        the integration-wide request rate. `base_url` points the client at another
+        portal instance (e.g. the local stand-in of scripts/fake_portal.py).
+        `breaker` (a scheduler.CircuitBreaker, possibly shared) pauses requests
+        while the portal is down; a private one is used if omitted.
+        """
         self.username = username
         self.password = password
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36',
-            'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7', # Default for page load
-            'accept-language': 'es-ES,es;q=0.9',
-        })
+        self.base_url = base_url.rstrip('/')
+        self.login_url = f"{self.base_url}{LOGIN_PATH}"
+        self.consumo_page_url = f"{self.base_url}{CONSUMO_PAGE_PATH}"
+        self.hourly_api_url = f"{self.base_url}{HOURLY_API_PATH}"
+        self.contracts_url = f"{self.base_url}{CONTRACTS_PATH}"
+        self._session = session
+        self._owns_session = session is None
         self._account_info = None
+        # Contracts cache: list, hash of the page fragment it was parsed from, wall time of the last check
         self._contracts = None
+        self._contracts_hash = None
+        self._contracts_checked = 0.0
+        self._contracts_retry_at = 0.0 # Monotonic; no new fetch before this after a failure
         self._p_auth_token_login = None # Store token extracted during login
+        # Cached API token (p_auth) and its monotonic expiry
+        self._api_token = None
+        self._api_token_expires = 0.0
+        self._api_token_lock = asyncio.Lock()
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_gate = request_gate
+        self.breaker = breaker or CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT)
+        self._login_lock = asyncio.Lock()
+        self._last_login = 0.0 # Monotonic time of the last successful login
+        self._credentials_rejected = False # No more logins until re-authentication (avoids an account lockout)
+        # Incremental fetch state per contract key
+        self._series: dict[str, ContractSeries] = {}
+        self._last_result = None # Last get_consumption_data result, reused while the payloads are unchanged
+        self._last_result_contracts = None
+        self.metrics = PollMetrics() # Per-phase timings, bytes, rows and retries
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the aiohttp session, creating a private one if none was given."""
+        if self._session is None or (self._owns_session and self._session.closed):
+            self._session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self._session
+
+    async def async_close(self, given_session=False):
+        """Close the aiohttp session if this client created it (or, with `given_session`, the one it was given).
+
+        Use `given_session` for a session made for this client only (e.g. HA's
+        `async_create_clientsession`), never for a session shared with others.
+        """
+        if (self._owns_session or given_session) and self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    # --- Persisted session (cookies + login p_auth) ---
+    def export_session(self):
+        """Return the portal cookies and login p_auth as a JSON-serializable dict (for HA storage)."""
+        cookies = [
+            {"name": c.key, "value": c.value, "domain": c["domain"], "path": c["path"] or "/", "expires": c["expires"]}
+            for c in self.session.cookie_jar
+        ]
+        return {"cookies": cookies, "p_auth": self._p_auth_token_login}
+
+    def restore_session(self, stored):
+        """Load cookies and login p_auth saved by export_session; returns True if anything was restored."""
+        if not stored or not stored.get("cookies"): return False
+        base_url = URL(self.base_url)
+        for cookie in stored["cookies"]:
+            try:
+                morsel_cookie = SimpleCookie(); morsel_cookie[cookie["name"]] = cookie["value"]
+                morsel = morsel_cookie[cookie["name"]]
+                for attr in ("domain", "path", "expires"):
+                    if cookie.get(attr): morsel[attr] = cookie[attr]
+                self.session.cookie_jar.update_cookies(morsel_cookie, base_url)
+            except (KeyError, TypeError, ValueError) as err: _LOGGER.debug("Skipping stored cookie: %s", err)
+        self._p_auth_token_login = stored.get("p_auth")
+        _LOGGER.debug("Restored %d session cookies for user %s", len(stored["cookies"]), self.username)
+        return True
+
+    async def async_validate_session(self):
+        """Cheaply check the current cookies by loading the consumption page (no login POST).
 
-        # Set locale
-        try: locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
-        except locale.Error:
-            try: locale.setlocale(locale.LC_TIME, 'es_ES')
-            except locale.Error: _LOGGER.warning("Could not set Spanish locale.")
+        On success the page's p_auth is cached, so the next API call needs no page load.
+        """
+        try: token = await self._async_fetch_fresh_p_auth()
+        except SessionExpired: _LOGGER.debug("Stored session has expired."); return False
+        if not token: return False
+        self._cache_api_token(token)
+        _LOGGER.info("Resumed stored portal session for user %s", self.username)
+        return True
 
+    async def _async_request(self, method, url, *, headers=None, timeout=30, **kwargs):
+        """Perform a request and return (status, final_url, text).
 
-    def login(self):
-        """Login to the portal and extract initial p_auth token."""
+        Network errors, 429 and 5xx answers are retried with jittered exponential
+        backoff; all go through the circuit breaker, which raises PortalUnavailable
+        while the portal is considered down.
+        """
+        for attempt in range(REQUEST_ATTEMPTS):
+            try: probe = self.breaker.before_request()
+            except CircuitOpenError as err: raise PortalUnavailable(str(err)) from err
+            try:
+                if self.request_gate is None: result = await self._async_send(method, url, headers=headers, timeout=timeout, **kwargs)
+                else:
+                    async with self.request_gate.slot(self.username):
+                        result = await self._async_send(method, url, headers=headers, timeout=timeout, **kwargs)
+            except REQUEST_ERRORS as err:
+                self.breaker.record_failure()
+                if attempt + 1 == REQUEST_ATTEMPTS: raise
+                reason = err
+            except BaseException: # Cancelled (or a bug): no verdict on the portal
+                if probe: self.breaker.release_probe()
+                raise
+            else:
+                if result[0] not in TRANSIENT_STATUSES: self.breaker.record_success(); return result
+                self.breaker.record_failure()
+                if attempt + 1 == REQUEST_ATTEMPTS: return result
+                reason = f"HTTP {result[0]}"
+            delay = backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY)
+            _LOGGER.debug("%s %s failed (%s); retry %d in %.1f s.", method, url, reason, attempt + 1, delay)
+            self.metrics.add(COUNTER_RETRIES)
+            await asyncio.sleep(delay)
+
+    @contextlib.asynccontextmanager
+    async def _async_open(self, method, url, *, headers=None, timeout=30, **kwargs):
+        """Open a request (through the breaker and request gate) and yield the response for streaming (no retries)."""
+        try: probe = self.breaker.before_request()
+        except CircuitOpenError as err: raise PortalUnavailable(str(err)) from err
+        async with contextlib.AsyncExitStack() as stack:
+            try:
+                if self.request_gate is not None: await stack.enter_async_context(self.request_gate.slot(self.username))
+                self.metrics.add(COUNTER_REQUESTS)
+                response = await stack.enter_async_context(self.session.request(
+                    method, url, headers={**DEFAULT_HEADERS, **(headers or {})},
+                    timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True, **kwargs
+                ))
+            except REQUEST_ERRORS: self.breaker.record_failure(); raise
+            except BaseException: # Cancelled (or a bug): no verdict on the portal
+                if probe: self.breaker.release_probe()
+                raise
+            if response.status in TRANSIENT_STATUSES: self.breaker.record_failure()
+            else: self.breaker.record_success()
+            yield response
+
+    async def _async_send(self, method, url, *, headers=None, timeout=30, **kwargs):
+        request_headers = {**DEFAULT_HEADERS, **(headers or {})}
+        async with self.session.request(
+            method, url, headers=request_headers,
+            timeout=aiohttp.ClientTimeout(total=timeout), allow_redirects=True, **kwargs
+        ) as response:
+            body = await response.read() # Cached: text() decodes it without reading again
+            self.metrics.add(COUNTER_REQUESTS); self.metrics.add(COUNTER_BYTES, len(body))
+            return response.status, str(response.url), await response.text(errors="replace")
+
+
+    async def async_login(self):
+        """Login to the portal and extract initial p_auth token.
+
+        Once the portal has rejected the credentials no further login is attempted
+        (ConfigEntryAuthFailed straight away); re-authentication creates a new client.
+        """
+        if self._credentials_rejected: raise ConfigEntryAuthFailed(f"Credentials of {self.username} were rejected; re-authentication required.")
+        with self.metrics.phase(PHASE_LOGIN): result = await self._async_login()
+        self._last_login = time.monotonic()
+        return result
+
+    async def _async_login(self):
         _LOGGER.debug("Attempting login process for user: %s", self.username)
         try:
-            _LOGGER.debug("Step 1: GET request to login page: %s", LOGIN_URL)
-            login_page = self.session.get(LOGIN_URL, timeout=30)
-            login_page.raise_for_status()
-        except requests.exceptions.RequestException as err:
+            _LOGGER.debug("Step 1: GET request to login page: %s", self.login_url)
+            with self.metrics.phase(PHASE_LOGIN_PAGE):
+                status, _, login_page_text = await self._async_request("GET", self.login_url)
+                _raise_for_status(status, self.login_url)
+        except REQUEST_ERRORS as err: # Portal trouble, not bad credentials
             _LOGGER.error("Login page GET failed: %s", err)
-            raise ConfigEntryAuthFailed(f"Failed to retrieve login page: {err}") from err
+            raise PortalUnavailable(f"Failed to retrieve login page: {err}") from err
 
-        soup = BeautifulSoup(login_page.text, 'html.parser')
-        login_form = soup.find('form', {'id': 'loginForm'})
+        # Fast single-pass extraction; full BeautifulSoup tree only if the markup is unexpected
+        login_form = extract_login_form(login_page_text)
+        if login_form is None:
+            _LOGGER.debug("Fast login form extraction failed; parsing the full page.")
+            login_form = extract_login_form_soup(_soup(login_page_text))
         if not login_form: raise ConfigEntryAuthFailed("Login form not found.")
 
-        action_url = login_form.get('action')
+        action_url, hidden_fields = login_form
         if not action_url: raise ConfigEntryAuthFailed("Login form 'action' URL not found.")
 
-        p_auth_match = re.search(r'[?&]p_auth=([^&]+)', action_url)
-        if p_auth_match: self._p_auth_token_login = p_auth_match.group(1)
-        else:
-            p_auth_input = login_form.find('input', {'name': 'p_auth', 'type': 'hidden'})
-            if p_auth_input and p_auth_input.get('value'): self._p_auth_token_login = p_auth_input['value']
+        self._p_auth_token_login = login_p_auth(action_url, hidden_fields)
+        self._invalidate_api_token() # New session, previous page token is useless
         if self._p_auth_token_login: _LOGGER.info("Extracted initial p_auth token: %s", self._p_auth_token_login)
         else: _LOGGER.warning("Could not extract initial p_auth token during login.")
 
-        if not action_url.startswith('http'): action_url = urljoin(LOGIN_URL, action_url)
-        hidden_fields = { inp.get('name'): inp.get('value', '') for inp in login_form.find_all('input', type='hidden') if inp.get('name') }
+        if not action_url.startswith('http'): action_url = urljoin(self.login_url, action_url)
         login_data = { "_CustomLoginPortlet_login": self.username, "_CustomLoginPortlet_password": self.password, **hidden_fields }
 
         try:
             _LOGGER.debug("Step 4: POST request to login action URL: %s", action_url)
-            login_response = self.session.post( action_url, data=login_data, headers={"Referer": LOGIN_URL}, timeout=30, allow_redirects=True )
-            _LOGGER.debug("Login POST completed. Status: %s, Final URL: %s", login_response.status_code, login_response.url)
-            login_response.raise_for_status()
-        except requests.exceptions.RequestException as err:
+            with self.metrics.phase(PHASE_LOGIN_POST):
+                status, final_url, _ = await self._async_request("POST", action_url, data=login_data, headers={"Referer": self.login_url})
+                _LOGGER.debug("Login POST completed. Status: %s, Final URL: %s", status, final_url)
+                _raise_for_status(status, action_url)
+        except REQUEST_ERRORS as err:
             _LOGGER.error("Login POST request failed: %s", err)
-            raise ConfigEntryAuthFailed(f"Login POST request failed: {err}") from err
+            raise PortalUnavailable(f"Login POST request failed: {err}") from err
 
-        final_url_lower = login_response.url.lower()
+        final_url_lower = final_url.lower()
         if "login" in final_url_lower or "error" in final_url_lower or "claveacceso" in final_url_lower or "signin" in final_url_lower:
-            _LOGGER.error("Login failed detected. Final URL: %s", login_response.url)
+            _LOGGER.error("Login failed detected. Final URL: %s", final_url)
+            self._credentials_rejected = True
             raise ConfigEntryAuthFailed("Login failed. Invalid credentials or login error.")
 
-        _LOGGER.info("Redirected after login POST: %s", login_response.url)
-        _LOGGER.debug("Cookies after login: %s", self.session.cookies.items())
+        _LOGGER.info("Redirected after login POST: %s", final_url)
+        _LOGGER.debug("Cookies after login: %s", [(c.key, c.value) for c in self.session.cookie_jar])
         _LOGGER.info("Login successful for user %s", self.username)
         return True
 
 
     def _find_fresh_p_auth(self, soup):
-        """Helper to find p_auth token within a BeautifulSoup object, prioritizing scripts."""
-        _LOGGER.debug("Searching for fresh p_auth token in page content...")
-        scripts = soup.find_all('script')
-        for script in scripts: # 1. Check scripts
-            if script.string:
-                match = re.search(r'p_auth=([a-zA-Z0-9]+)[&\s\'"]', script.string)
-                if match: token = match.group(1); _LOGGER.info("Found p_auth in SCRIPT: %s", token); return token
-        portlet_div = soup.find(id=re.compile(r'p_p_id_MisConsumos', re.I)) or soup
-        forms = portlet_div.find_all('form') # 2. Check forms
-        for form in forms:
-            action = form.get('action', ''); match = re.search(r'[?&]p_auth=([^&]+)', action)
-            if match: token = match.group(1); _LOGGER.info("Found p_auth in form action: %s", token); return token
-            hidden = form.find('input', {'name': 'p_auth', 'type': 'hidden'})
-            if hidden and hidden.get('value'): token = hidden['value']; _LOGGER.info("Found p_auth in form hidden: %s", token); return token
-        links = portlet_div.find_all('a', href=True) # 3. Check links
-        for link in links:
-            match = re.search(r'[?&]p_auth=([^&]+)', link['href'])
-            if match: token = match.group(1); _LOGGER.info("Found p_auth in link: %s", token); return token
-        hidden = soup.find('input', {'name': 'p_auth', 'type': 'hidden'}) # 4. Check global hidden
-        if hidden and hidden.get('value'): token = hidden['value']; _LOGGER.info("Found p_auth in global hidden: %s", token); return token
-        _LOGGER.warning("Could not find a fresh p_auth token in page content.")
-        return None
-
+        """Helper to find p_auth token within a BeautifulSoup object (full-tree fallback)."""
+        return find_p_auth_soup(soup)
 
-    def get_consumption_data(self, days_back=2):
-        """Fetches consumption data by calling the direct hourly API endpoint."""
 
-        # --- Step 1: Load Consumption Page HTML to find fresh p_auth ---
-        _LOGGER.debug("Loading consumption page HTML for fresh p_auth: %s", CONSUMO_PAGE_URL)
-        fresh_p_auth_token = None
+    async def _async_fetch_fresh_p_auth(self):
+        """Load the consumption page HTML and return a fresh p_auth token (or None)."""
+        _LOGGER.debug("Loading consumption page HTML for fresh p_auth: %s", self.consumo_page_url)
         try:
-            page_headers = self.session.headers.copy()
-            page_headers['accept'] = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
-            if 'X-Requested-With' in page_headers: del page_headers['X-Requested-With']
-
-            _LOGGER.debug("Cookies before loading consumption page: %s", self.session.cookies.items())
-            response_page = self.session.get(CONSUMO_PAGE_URL, headers=page_headers, timeout=30, allow_redirects=True)
-            _LOGGER.debug("Consumption page GET status: %s, final URL: %s", response_page.status_code, response_page.url)
-            if "login" in response_page.url.lower(): raise UpdateFailed("Session expired (consumption page redirect).")
-            response_page.raise_for_status()
-
-            page_soup = BeautifulSoup(response_page.text, 'html.parser')
-            fresh_p_auth_token = self._find_fresh_p_auth(page_soup)
-
-        except requests.exceptions.RequestException as err:
-             _LOGGER.error("Error loading consumption page HTML %s: %s", CONSUMO_PAGE_URL, err)
+            with self.metrics.phase(PHASE_CONSUMPTION_PAGE):
+                status, final_url, page_text = await self._async_request("GET", self.consumo_page_url, headers={'accept': PAGE_ACCEPT})
+                _LOGGER.debug("Consumption page GET status: %s, final URL: %s", status, final_url)
+                if "login" in final_url.lower(): raise SessionExpired("Session expired (consumption page redirect).")
+                _raise_for_status(status, self.consumo_page_url)
+
+            with self.metrics.phase(PHASE_P_AUTH_PARSE):
+                token = find_p_auth(page_text)
+                if token: _LOGGER.debug("Found fresh p_auth with fast extraction."); return token
+                _LOGGER.debug("Fast p_auth extraction failed; parsing the full page.")
+                return self._find_fresh_p_auth(_soup(page_text))
+
+        except REQUEST_ERRORS as err:
+             _LOGGER.error("Error loading consumption page HTML %s: %s", self.consumo_page_url, err)
              _LOGGER.warning("Proceeding without fresh p_auth token.")
         except UpdateFailed as err: raise err
         except Exception as err:
              _LOGGER.exception("Error parsing consumption page HTML: %s", err)
              _LOGGER.warning("Proceeding without fresh p_auth token.")
+        return None
 
-        api_p_auth_token = fresh_p_auth_token or self._p_auth_token_login
-        if not api_p_auth_token: raise UpdateFailed("Missing p_auth token, cannot call API.")
-        _LOGGER.info("Using p_auth token for API call.")
 
-        # --- Step 2: Prepare API Parameters ---
-        end_date_str = date.today().strftime("%d/%m/%Y")
-        start_date_str = (date.today() - timedelta(days=days_back)).strftime("%d/%m/%Y")
+    def _hourly_params(self, p_auth_token, start_date, end_date, inicio, fin, contract):
         params = {
             'p_p_id': 'MisConsumos', 'p_p_lifecycle': '2', 'p_p_state': 'normal', 'p_p_mode': 'view',
-            'p_p_cacheability': 'cacheLevelPage', 'p_auth': api_p_auth_token,
-            '_MisConsumos_op': 'buscarConsumosHoraria', '_MisConsumos_fechaInicio': start_date_str,
-            '_MisConsumos_fechaFin': end_date_str, '_MisConsumos_inicio': '0', '_MisConsumos_fin': '200'
+            'p_p_cacheability': 'cacheLevelPage', 'p_auth': p_auth_token,
+            '_MisConsumos_op': 'buscarConsumosHoraria', '_MisConsumos_fechaInicio': start_date.strftime("%d/%m/%Y"),
+            '_MisConsumos_fechaFin': end_date.strftime("%d/%m/%Y"), '_MisConsumos_inicio': str(inicio), '_MisConsumos_fin': str(fin)
         }
-        _LOGGER.debug("Calling API: %s", HOURLY_API_URL)
+        if self._selects_contract(contract): params[CONTRACT_PARAM] = contract
+        _LOGGER.debug("Calling API: %s", self.hourly_api_url)
         _LOGGER.debug("API Params (p_auth hidden): %s", {k: v for k, v in params.items() if k != 'p_auth'})
+        return params
 
-        # --- Step 3: Call the API ---
-        try:
-            api_headers = self.session.headers.copy()
-            api_headers['accept'] = 'application/json, text/javascript, */*; q=0.01'
-            api_headers['X-Requested-With'] = 'XMLHttpRequest'
-            api_headers['Referer'] = CONSUMO_PAGE_URL
+    def _selects_contract(self, contract):
+        """Return True if a request must name `contract`.
 
-            _LOGGER.debug("Cookies before API call: %s", self.session.cookies.items())
-            response_api = self.session.get(HOURLY_API_URL, params=params, headers=api_headers, timeout=45)
-            _LOGGER.debug("API response status: %s", response_api.status_code)
+        CONTRACT_PARAM is only sent for accounts with several contracts; a
+        single-contract account sends the same request as the portal's own page.
+        """
+        return bool(contract) and sum(1 for c in self._contracts or () if c.get("contract_number")) > 1
 
-            if "login" in response_api.url.lower(): raise UpdateFailed("Session expired (API redirect).")
-            if response_api.status_code == 401: raise UpdateFailed("Authorization error (401) calling API.")
-            response_api.raise_for_status()
+    def _api_headers(self):
+        return {'accept': API_ACCEPT, 'X-Requested-With': 'XMLHttpRequest', 'Referer': self.consumo_page_url}
 
-            # --- Step 4: Parse the JSON Response ---
-            try: data = response_api.json()
-            except json.JSONDecodeError as err:
-                 _LOGGER.error("API response not JSON: %s", err); _LOGGER.debug("API Text: %s", response_api.text[:500])
-                 raise UpdateFailed(f"API response not valid JSON: {err}")
-
-            # --- Step 5: Process the JSON Data ---
-            hourly_consumption_values = {}
-            latest_reading = None
-            latest_reading_datetime = None
-            if "consumos" in data and isinstance(data["consumos"], list):
-                _LOGGER.debug("Processing %d entries from API.", len(data["consumos"]))
-                for entry in data["consumos"]:
-                    if not isinstance(entry, dict): continue
-                    fecha_str = entry.get("fechaConsumo"); hora_str = entry.get("horaConsumo")
-                    consumo_str = entry.get("consumo"); lectura_str = entry.get("lectura")
-                    if fecha_str and hora_str:
-                        iso_timestamp = self._combine_date_hour_spanish(fecha_str, hora_str)
-                        if iso_timestamp:
-                            consumption_val = self._extract_number(consumo_str)
-                            if consumption_val is not None: hourly_consumption_values[iso_timestamp] = consumption_val
-                            reading_val = self._extract_number(lectura_str)
-                            if reading_val is not None:
-                                try:
-                                    current_dt = datetime.fromisoformat(iso_timestamp)
-                                    if latest_reading_datetime is None or current_dt >= latest_reading_datetime:
-                                         latest_reading_datetime = current_dt; latest_reading = reading_val
-                                except: pass
-                _LOGGER.info("Parsed %d hourly points.", len(hourly_consumption_values))
-            else: _LOGGER.warning("API JSON missing 'consumos' list.")
-
-            # --- Prepare final data structure ---
-            result_data = {
-                "current_consumption": latest_reading,
-                "last_reading_date": latest_reading_datetime.strftime('%Y-%m-%d') if latest_reading_datetime else None,
-                "hourly_consumption": hourly_consumption_values,
-                "contract_number": None, "address": None,
-            }
+    async def _async_call_hourly_api(self, p_auth_token, start_date, end_date, inicio=0, fin=API_PAGE_SIZE, contract=None, fingerprint=None):
+        """Call the buscarConsumosHoraria JSON endpoint and return (body digest, decoded payload).
 
-            # --- Add Optional Contract Info ---
-            try:
-                contracts = self.get_contracts()
-                if contracts:
-                    result_data["contract_number"] = contracts[0].get("contract_number")
-                    result_data["address"] = contracts[0].get("address")
-            except Exception as contract_err: _LOGGER.warning("Could not get contract info: %s", contract_err)
+        The payload is None (not decoded) when the digest equals `fingerprint`.
+        """
+        params = self._hourly_params(p_auth_token, start_date, end_date, inicio, fin, contract)
+        with self.metrics.phase(PHASE_HOURLY_API):
+            status, final_url, text = await self._async_request("GET", self.hourly_api_url, params=params, headers=self._api_headers(), timeout=45)
+            _LOGGER.debug("API response status: %s", status)
 
-            return result_data
+            if "login" in final_url.lower(): raise ApiTokenRejected("Session expired (API redirect).")
+            if status == 401: raise ApiTokenRejected("Authorization error (401) calling API.")
+            _raise_for_status(status, self.hourly_api_url)
+
+            digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            if digest == fingerprint: return digest, None
+            try: return digest, json.loads(text)
+            except json.JSONDecodeError as err:
+                 _LOGGER.error("API response not JSON: %s", err); _LOGGER.debug("API Text: %s", text[:500])
+                 raise ApiTokenRejected(f"API response not valid JSON: {err}")
+
+    async def _async_hourly_api(self, start_date, end_date, inicio=0, fin=API_PAGE_SIZE, contract=None, fingerprint=None):
+        """Call the hourly API with the cached p_auth, reloading the page only if it is rejected."""
+        token = self._cached_api_token()
+        if token is None: return await self._async_call_hourly_api(await self.async_get_api_token(), start_date, end_date, inicio, fin, contract, fingerprint)
+        try:
+            return await self._async_call_hourly_api(token, start_date, end_date, inicio, fin, contract, fingerprint)
+        except ApiTokenRejected as err:
+            _LOGGER.debug("Cached p_auth rejected (%s); reloading consumption page.", err)
+            if self._api_token == token: self._invalidate_api_token()
+            self.metrics.add(COUNTER_RETRIES)
+            return await self._async_call_hourly_api(await self.async_get_api_token(), start_date, end_date, inicio, fin, contract, fingerprint)
+
+
+    # --- p_auth token cache ---
+    def _cached_api_token(self):
+        """Return the cached API token if it is still within its validity window."""
+        if self._api_token and time.monotonic() < self._api_token_expires: return self._api_token
+        return None
 
-        except requests.exceptions.RequestException as err:
-             _LOGGER.error("Error calling API %s: %s", HOURLY_API_URL, err)
+    def _invalidate_api_token(self):
+        self._api_token = None; self._api_token_expires = 0.0
+
+    async def async_get_api_token(self):
+        """Return a p_auth token for the JSON API (cached, else fresh from the page, else the login one).
+
+        Logs in again when the page shows the session has expired.
+        """
+        async with self._api_token_lock: # Concurrent callers share one page load
+            token = self._cached_api_token()
+            if token: return token
+            try: fresh_p_auth_token = await self._async_fetch_fresh_p_auth()
+            except SessionExpired as err:
+                await self.async_relogin(err)
+                fresh_p_auth_token = await self._async_fetch_fresh_p_auth()
+            api_p_auth_token = fresh_p_auth_token or self._p_auth_token_login
+            if not api_p_auth_token: raise UpdateFailed("Missing p_auth token, cannot call API.")
+            self._cache_api_token(api_p_auth_token)
+            return api_p_auth_token
+
+    async def async_relogin(self, reason=None):
+        """Log in again after the session expired (concurrent callers share one login)."""
+        attempt_started = time.monotonic()
+        async with self._login_lock:
+            if self._last_login > attempt_started: return # Someone else just logged in
+            _LOGGER.info("Portal session of %s expired (%s); logging in again.", self.username, reason)
+            self.metrics.add(COUNTER_RELOGINS)
+            await self.async_login()
+
+    def _cache_api_token(self, token):
+        self._api_token = token; self._api_token_expires = time.monotonic() + P_AUTH_TTL.total_seconds()
+
+    async def _async_stream_hourly_page(self, p_auth_token, start_date, end_date, inicio, fin, contract):
+        """Stream one buscarConsumosHoraria page, yielding raw consumos entries as they are decoded."""
+        params = self._hourly_params(p_auth_token, start_date, end_date, inicio, fin, contract)
+        async with self._async_open("GET", self.hourly_api_url, params=params, headers=self._api_headers(), timeout=45) as response:
+            _LOGGER.debug("API response status: %s", response.status)
+            if "login" in str(response.url).lower(): raise ApiTokenRejected("Session expired (API redirect).")
+            if response.status == 401: raise ApiTokenRejected("Authorization error (401) calling API.")
+            _raise_for_status(response.status, self.hourly_api_url)
+            stream = ConsumosStream(); text_decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+            yielded = False
+            try:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    self.metrics.add(COUNTER_BYTES, len(chunk))
+                    entries = stream.feed(text_decoder.decode(chunk))
+                    if entries: yielded = True; yield entries
+                entries = stream.feed(text_decoder.decode(b"", final=True))
+                if entries: yield entries
+                stream.close()
+            except ValueError as err:
+                if yielded: raise UpdateFailed(f"API response cut short: {err}") from err
+                raise ApiTokenRejected(f"API response not valid JSON: {err}") from err
+            if not stream.found: _LOGGER.warning("API JSON missing 'consumos' list.")
+
+    async def _async_iter_hourly_page(self, start_date, end_date, inicio, fin, contract):
+        """Stream one page with the cached p_auth, reloading the page once if the token is rejected."""
+        token = self._cached_api_token() or await self.async_get_api_token()
+        try:
+            async for entries in self._async_stream_hourly_page(token, start_date, end_date, inicio, fin, contract): yield entries
+            return
+        except ApiTokenRejected as err: # Only raised before any entry was yielded
+            _LOGGER.debug("p_auth rejected (%s); reloading consumption page.", err)
+            if self._api_token == token: self._invalidate_api_token()
+            self.metrics.add(COUNTER_RETRIES)
+        async for entries in self._async_stream_hourly_page(await self.async_get_api_token(), start_date, end_date, inicio, fin, contract):
+            yield entries
+
+    async def async_iter_hourly_range(self, start_date, end_date, contract=None, page_size=API_PAGE_SIZE):
+        """Yield the hourly rows between two dates as they stream in, paging through inicio/fin.
+
+        Each item is a list of (datetime, consumption, reading) rows decoded from one
+        chunk of a page, so memory stays flat whatever the range length. The
+        incremental fetch state is not touched.
+        """
+        inicio = 0; previous_first = None; total = 0
+        for _ in range(API_MAX_PAGES):
+            count = 0; first = None
+            async with contextlib.aclosing(self._async_iter_hourly_page(start_date, end_date, inicio, inicio + page_size, contract)) as page:
+                async for entries in page:
+                    if first is None:
+                        first = entries[0]
+                        if first == previous_first: break # Same page again: paging ignored
+                    count += len(entries)
+                    rows = list(zip(*decode_consumos(entries)))
+                    total += len(rows)
+                    if rows: yield rows
+            if first is not None and first == previous_first: _LOGGER.warning("API ignored paging parameters; stopping at %d rows.", total); break
+            if count < page_size: break
+            previous_first = first; inicio += page_size
+        _LOGGER.debug("Fetched %d hourly rows for %s - %s (contract %s).", total, start_date, end_date, contract)
+
+    async def async_fetch_hourly_range(self, start_date, end_date, contract=None, page_size=API_PAGE_SIZE):
+        """Fetch every hourly row between two dates; returns [(datetime, consumption, reading)]."""
+        rows = []
+        async for batch in self.async_iter_hourly_range(start_date, end_date, contract, page_size): rows.extend(batch)
+        return rows
+
+    @property
+    def series(self) -> dict:
+        """Return the incremental fetch state per contract key (contract number, "" if unknown)."""
+        return self._series
+
+    def export_state(self):
+        """Return the incremental fetch state as a JSON-serializable dict (for HA storage)."""
+        state = {"contracts": {key: series.as_dict() for key, series in self._series.items()}}
+        if self._contracts: state["contracts_cache"] = {"contracts": self._contracts, "hash": self._contracts_hash, "checked": self._contracts_checked}
+        return state
+
+    def restore_state(self, state):
+        """Restore the incremental fetch state saved by export_state."""
+        if not state: return
+        try:
+            if "contracts" in state:
+                self._series = {key: ContractSeries.from_dict(value) for key, value in state["contracts"].items()}
+            else: # Single-contract layout of earlier versions
+                self._series = {"": ContractSeries.from_dict(state)}
+            _LOGGER.debug("Restored fetch state of %d contract(s).", len(self._series))
+            if cache := state.get("contracts_cache"):
+                self._contracts = [{"contract_number": c["contract_number"], "address": c.get("address")} for c in cache["contracts"]]
+                self._contracts_hash = cache.get("hash"); self._contracts_checked = float(cache.get("checked") or 0)
+        except (KeyError, TypeError, ValueError, AttributeError) as err:
+            _LOGGER.warning("Ignoring invalid stored fetch state: %s", err)
+
+
+    async def async_get_consumption_data(self, days_back=2):
+        """Fetches consumption data of every contract by calling the direct hourly API endpoint.
+
+        Only the range from each contract's high-water mark onward is requested; new rows
+        are merged into the retained `days_back` window. Contracts are polled concurrently,
+        at most `max_concurrency` at a time. When no API body changed since the last
+        poll (and the contracts are the same) the previous result object is returned.
+        """
+        with self.metrics.poll(): return await self._async_get_consumption_data(days_back)
+
+    async def _async_get_consumption_data(self, days_back):
+        try:
+            # --- Step 1: Contracts (cached after the first call) ---
+            try: contracts = await self.async_get_contracts()
+            except Exception as contract_err: _LOGGER.warning("Could not get contract info: %s", contract_err); contracts = []
+            contracts = [c for c in contracts if c.get("contract_number")]
+            if contracts and "" in self._series and contracts[0]["contract_number"] not in self._series:
+                self._series[contracts[0]["contract_number"]] = self._series.pop("") # Contract became known
+
+            # --- Step 2: Call the API per contract (incremental range) ---
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            async def _async_poll(contract_number):
+                async with semaphore:
+                    return await self._async_fetch_contract(contract_number, days_back)
+            numbers = [c["contract_number"] for c in contracts] or [None]
+            results = await asyncio.gather(*(_async_poll(n) for n in numbers), return_exceptions=True)
+            errors = [r for r in results if isinstance(r, BaseException)]
+            auth_error = next((e for e in errors if isinstance(e, ConfigEntryAuthFailed)), None)
+            if auth_error is not None: raise auth_error # Account-wide: reauth, not a flaky contract
+            if errors and len(errors) == len(results): raise errors[0]
+
+            # --- Step 3: Merge the new rows (primary first) ---
+            # Different contracts answered with the same rows: the contract selector was
+            # ignored, so only the first one (the primary) is stored
+            changed = False; seen = {}
+            for number, result in zip(numbers, results):
+                if isinstance(result, BaseException): _LOGGER.warning("Keeping previous data of contract %s: %s", number, result); continue
+                series, fingerprint, data = result
+                duplicate_of = seen.setdefault(fingerprint, number)
+                if data is None: _LOGGER.debug("API body of contract %s unchanged; skipping it.", number); continue
+                if duplicate_of != number and isinstance(data, dict) and data.get("consumos"):
+                    _LOGGER.warning("Contract %s got the same hourly rows as contract %s; not storing them (the portal may ignore %s).", number, duplicate_of, CONTRACT_PARAM)
+                    continue
+                with self.metrics.phase(PHASE_PROCESS_ROWS): self._process_consumos(data, series, days_back)
+                series.fingerprint = fingerprint; changed = True
+
+            # --- Step 4: Build the result (reused when nothing changed) ---
+            if self._last_result is not None and contracts == self._last_result_contracts and not changed:
+                _LOGGER.debug("API payloads unchanged; reusing the previous result.")
+                return self._last_result
+            self._last_result = self._build_result(contracts); self._last_result_contracts = contracts
+            return self._last_result
+
+        except REQUEST_ERRORS as err:
+             _LOGGER.error("Error calling API %s: %s", self.hourly_api_url, err)
              raise UpdateFailed(f"Error calling API: {err}") from err
-        except UpdateFailed as err: raise err
+        except (UpdateFailed, ConfigEntryAuthFailed): raise
         except Exception as err:
              _LOGGER.exception("Unexpected error processing API data: %s", err)
              raise UpdateFailed(f"Error processing API data: {err}") from err
 
+    async def _async_fetch_contract(self, contract_number, days_back):
+        """Fetch the new hourly rows of one contract.
+
+        Returns (series, body digest, payload); the payload is None if the body is unchanged.
+        """
+        series = self._series.setdefault(contract_number or "", ContractSeries())
+        series.new_rows = []
+        end_date = date.today()
+        start_date = end_date - timedelta(days=days_back)
+        if series.high_water_mark and series.high_water_mark.date() > start_date:
+            start_date = series.high_water_mark.date()
+        _LOGGER.debug("Requesting range %s - %s for contract %s (high-water mark: %s)", start_date, end_date, contract_number, series.high_water_mark)
+        # Uses the cached p_auth; the consumption page is only loaded when it is missing/rejected
+        fingerprint, data = await self._async_hourly_api(start_date, end_date, contract=contract_number, fingerprint=series.fingerprint)
+        return series, fingerprint, data
+
+
+    def _process_consumos(self, data, series, days_back=2):
+        """Merge rows newer than the series' high-water mark into its retained hourly data.
+
+        Returns the new (datetime, consumption, reading) rows, also kept in `series.new_rows`.
+        """
+        previous_mark = series.high_water_mark
+        new_mark = previous_mark
+        new_rows = []
+        if "consumos" in data and isinstance(data["consumos"], list):
+            _LOGGER.debug("Processing %d entries from API.", len(data["consumos"]))
+            self.metrics.add(COUNTER_ROWS, len(data["consumos"]))
+            timestamps, consumptions, readings = decode_consumos(data["consumos"], after=previous_mark)
+            hourly = series.hourly_consumption
+            for current_dt, consumption_val, reading_val in zip(timestamps, consumptions, readings):
+                if consumption_val is not None: hourly[current_dt.isoformat(timespec='seconds')] = consumption_val
+                if reading_val is not None and (series.latest_reading_datetime is None or current_dt >= series.latest_reading_datetime):
+                    series.latest_reading_datetime = current_dt; series.latest_reading = reading_val
+            if timestamps and (new_mark is None or max(timestamps) > new_mark): new_mark = max(timestamps)
+            new_rows = list(zip(timestamps, consumptions, readings))
+            self.metrics.add(COUNTER_NEW_ROWS, len(new_rows))
+            _LOGGER.info("Parsed %d new hourly points.", len(new_rows))
+        else: _LOGGER.warning("API JSON missing 'consumos' list.")
+
+        if new_mark != previous_mark:
+            series.high_water_mark = new_mark
+            # Drop points that fell out of the retained window
+            cutoff = (new_mark - timedelta(days=days_back)).isoformat(timespec='seconds')
+            series.hourly_consumption = {k: v for k, v in series.hourly_consumption.items() if k >= cutoff}
+        series.new_rows = new_rows
+        return new_rows
+
+    def restore_result(self, contracts):
+        """Rebuild the last get_consumption_data result from the restored fetch state (no request).
+
+        `contracts` are the {"contract_number", "address"} dicts of that result, primary
+        first. Returns None when there is no state to show. The next poll returns this
+        same object if nothing changed.
+        """
+        if not self._series: return None
+        self._last_result = self._build_result(contracts); self._last_result_contracts = contracts
+        return self._last_result
+
+    def _build_result(self, contracts):
+        """Build the coordinator data structure from the retained state.
+
+        The top-level keys describe the primary (first) contract; `contracts` holds
+        the same structure for every contract key.
+        """
+        info = {c["contract_number"]: c for c in contracts}
+        per_contract = {}
+        for key, series in self._series.items():
+            per_contract[key] = {
+                "current_consumption": series.latest_reading,
+                "last_reading_date": series.latest_reading_datetime.strftime('%Y-%m-%d') if series.latest_reading_datetime else None,
+                "hourly_consumption": HourlySeries.from_mapping(series.hourly_consumption),
+                "contract_number": key or None, "address": info.get(key, {}).get("address"),
+            }
+        primary = contracts[0]["contract_number"] if contracts else next(iter(per_contract), "")
+        return {**per_contract.get(primary, {}), "primary": primary, "contracts": per_contract}
+
+
+    async def async_get_account_info(self):
+        """Return {"name", "contracts"} of the logged-in account.
+
+        Costs one contracts page load, which is cached for the first poll. The name is
+        the primary contract number (the username if none was found).
+        """
+        contracts = [c for c in await self.async_get_contracts() if c.get("contract_number")]
+        return {"name": contracts[0]["contract_number"] if contracts else self.username, "contracts": contracts}
 
     # --- Optional get_contracts and _extract_contract_details ---
-    def get_contracts(self):
-        """Get list of contracts (optional, for attributes)."""
-        if self._contracts is not None: return self._contracts
-        self._contracts = []
-        contracts_url = f"{BASE_URL}/es/group/aigues-de-l-horta/contratos"
-        _LOGGER.debug("Fetching contracts (optional) from URL: %s", contracts_url)
+    async def async_get_contracts(self):
+        """Get list of contracts (optional, for attributes).
+
+        Cached for CONTRACTS_CACHE_TTL (also across restarts, see export_state); a
+        failed refresh keeps the previous list and is retried after CONTRACTS_RETRY_DELAY.
+        """
+        if self._contracts is not None and time.time() - self._contracts_checked < CONTRACTS_CACHE_TTL.total_seconds(): return self._contracts
+        if time.monotonic() < self._contracts_retry_at: return self._contracts or []
+        with self.metrics.phase(PHASE_CONTRACTS): return await self._async_fetch_contracts()
+
+    async def _async_fetch_contracts(self):
+        _LOGGER.debug("Fetching contracts (optional) from URL: %s", self.contracts_url)
         try:
-            response = self.session.get(contracts_url, timeout=20, allow_redirects=True)
-            if "login" in response.url.lower(): _LOGGER.warning("Session expired (contracts)."); return self._contracts
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            contracts = []
-            contract_containers = soup.select('div.contract-item, div.contract-summary, div.contract-card, li.contract, article.contrato, div[class*="contract"], div[class*="contrato"], div[class*="poliza"]')
-            if not contract_containers:
-                label_elements = soup.find_all(string=re.compile(r'N(?:º|umero)\s*d?e?\s*(?:Contrato|Póliza)', re.I))
-                contract_containers = list({elem.find_parent(['div', 'li', 'article', 'section', 'tr']) for elem in label_elements if elem.parent})
-            processed_numbers = set()
-            for container in contract_containers:
-                contract_data = self._extract_contract_details(container)
-                number = contract_data.get("contract_number")
-                if number and number not in processed_numbers:
-                    contracts.append(contract_data); processed_numbers.add(number)
-                    _LOGGER.info("Extracted contract: Number=%s", number)
-            if not contracts: _LOGGER.warning("Failed to extract contracts from: %s", contracts_url)
-            self._contracts = contracts
+            status, final_url, text = await self._async_request("GET", self.contracts_url, timeout=20)
+            if "login" in final_url.lower(): _LOGGER.warning("Session expired (contracts)."); return self._contracts or [] # Retried next call
+            _raise_for_status(status, self.contracts_url)
+            fragment = contracts_fragment(text)
+            page_hash = hashlib.sha1(fragment.encode()).hexdigest()
+            if self._contracts and page_hash == self._contracts_hash:
+                _LOGGER.debug("Contracts page unchanged, keeping %d contract(s).", len(self._contracts))
+            else:
+                contracts = self._parse_contracts(fragment)
+                if not contracts: _LOGGER.warning("Failed to extract contracts from: %s", self.contracts_url); return self._contracts_failed()
+                self._contracts = contracts; self._contracts_hash = page_hash
+            self._contracts_checked = time.time()
             return self._contracts
-        except requests.exceptions.RequestException as err: _LOGGER.error("HTTP Error fetching contracts: %s", err); return self._contracts
-        except Exception as err: _LOGGER.exception("Error parsing contracts page: %s", err); return self._contracts
+        except (PortalUnavailable, *REQUEST_ERRORS) as err: _LOGGER.error("HTTP Error fetching contracts: %s", err)
+        except Exception as err: _LOGGER.exception("Error parsing contracts page: %s", err)
+        return self._contracts_failed()
+
+    def _contracts_failed(self):
+        """Schedule the retry of a failed contracts fetch; return the previous list (or [])."""
+        self._contracts_retry_at = time.monotonic() + CONTRACTS_RETRY_DELAY.total_seconds()
+        return self._contracts or []
+
+    def _parse_contracts(self, fragment):
+        """Return the contracts of a page fragment; only the candidate containers are built (SoupStrainer)."""
+        from bs4 import SoupStrainer # pylint: disable=import-outside-toplevel
+        soup = _soup(fragment, SoupStrainer(CONTRACT_CONTAINER_TAGS, class_=CONTRACT_CLASS_RE))
+        contract_containers = soup.find_all(CONTRACT_CONTAINER_TAGS, class_=CONTRACT_CLASS_RE)
+        if not contract_containers: # Unknown markup: containers of the contract number labels, full tree
+            label_elements = _soup(fragment).find_all(string=CONTRACT_LABEL_RE)
+            contract_containers = list({elem.find_parent(CONTRACT_CONTAINER_TAGS) for elem in label_elements if elem.parent} - {None})
+        contracts = []; processed_numbers = set()
+        for container in contract_containers:
+            contract_data = self._extract_contract_details(container)
+            number = contract_data.get("contract_number")
+            if number and number not in processed_numbers:
+                contracts.append(contract_data); processed_numbers.add(number)
+                _LOGGER.info("Extracted contract: Number=%s", number)
+        return contracts
 
     def _extract_contract_details(self, container):
         """Helper to extract number and address from a contract container."""
         if not container: return {}
         contract_data = {"contract_number": None, "address": None}
         container_text = container.get_text(" ", strip=True)
-        number = None; number_match = re.search(r'N(?:º|umero)\s*d?e?\s*(?:Contrato|Póliza)\s*[:\-]?\s*(\d+)', container_text, re.I)
+        number = None; number_match = CONTRACT_NUMBER_RE.search(container_text)
         if number_match: number = number_match.group(1)
         else:
             possible_numbers = re.findall(r'\b(\d{6,12})\b', container_text); number = next((n for n in possible_numbers if len(n) != 5), None) if possible_numbers else None
@@ -281,66 +779,57 @@ class AiguesHortaAPI:
                      if 'contract' in attr_name.lower() or 'poliza' in attr_name.lower():
                          if isinstance(attr_val, str) and attr_val.isdigit() and len(attr_val) >= 6: number = attr_val; break
         contract_data["contract_number"] = number
-        address = None; address_match = re.search(r'(?:Dirección|Ubicación|Emplazamiento|Localización)\s*Suministro?\s*[:\-]?\s*(.+)', container_text, re.IGNORECASE | re.DOTALL)
+        address = None; address_match = CONTRACT_ADDRESS_RE.search(container_text)
         if address_match: address_raw = address_match.group(1).strip(); address = re.split(r'\n|\s+(?:Población|CP|Teléfono|Móvil|Titular):', address_raw, maxsplit=1)[0].strip()
-        elif container.find(class_=re.compile(r'address|direccion|ubicacion', re.I)): address_element = container.find(class_=re.compile(r'address|direccion|ubicacion', re.I)); address = address_element.get_text(" ", strip=True)
+        elif address_element := container.find(class_=CONTRACT_ADDRESS_CLASS_RE): address = address_element.get_text(" ", strip=True)
         contract_data["address"] = address
         return contract_data
 
 
-    # --- Helper functions _combine_date_hour_spanish, _extract_number ---
-    def _combine_date_hour_spanish(self, fecha_str, hora_str):
-        """ Combines 'DD mon YYYY' and 'HH:MM' into ISO 'YYYY-MM-DDTHH:MM:SS' """
-        try:
-            parsed_date = None; fecha_str_cleaned = str(fecha_str).strip()
-            try: # 1. Try locale parse
-                 current_locale = locale.getlocale(locale.LC_TIME)[0]
-                 if current_locale and 'es' in current_locale.lower(): parsed_date = datetime.strptime(fecha_str_cleaned, '%d %b %Y').date()
-            except ValueError: pass
-            except Exception as locale_err: _LOGGER.warning("Locale parse error: %s", locale_err)
-
-            if not parsed_date: # 2. Fallback manual map
-                 _LOGGER.debug("Attempting manual Spanish month mapping for '%s'", fecha_str_cleaned)
-                 month_map = {'ene':'01','feb':'02','mar':'03','abr':'04','may':'05','jun':'06','jul':'07','ago':'08','sep':'09','oct':'10','nov':'11','dic':'12'}
-                 match = re.match(r'(\d{1,2})\s+([a-záéíóú]+)\s+(\d{4})', fecha_str_cleaned, re.I)
-                 if match:
-                     day, month_str, year = match.groups(); month = month_map.get(month_str.lower()[:3])
-                     if not month: month = month_map.get(month_str.lower())
-
-                     # *** CORRECTED SYNTAX ***
-                     if month:
-                         try:
-                             parsed_date = date(int(year), int(month), int(day.zfill(2)))
-                         except ValueError:
-                             _LOGGER.warning("Invalid date components parsed via regex: Day=%s, Month=%s(%s), Year=%s", day, month_str, month, year)
-                             pass # parsed_date remains None
-                     # *** END CORRECTION ***
-                     else: _LOGGER.warning("Could not map Spanish month name: '%s'", month_str)
-
-            if not parsed_date: _LOGGER.error("Failed date parse: '%s'", fecha_str); return None
-            parsed_time = None; hora_str_cleaned = str(hora_str).strip()
-            if hora_str_cleaned:
-                 time_match = re.match(r'(\d{1,2}):(\d{2})', hora_str_cleaned)
-                 if time_match: hour, minute = map(int, time_match.groups()); parsed_time = timedelta(hours=hour, minutes=minute)
-            if not parsed_time: _LOGGER.warning("Bad time format: '%s', using 00:00", hora_str); parsed_time = timedelta()
-            dt_obj = datetime.combine(parsed_date, datetime.min.time()) + parsed_time
-            return dt_obj.isoformat(timespec='seconds')
-        except Exception as e: _LOGGER.error(f"Error combining date '{fecha_str}', hour '{hora_str}': {e}"); return None
-
-
-    def _extract_number(self, text):
-        """ Extract numeric value, handling comma/dot decimals """
-        if text is None: return None
-        text_to_parse = str(text).strip();
-        if not text_to_parse: return 0.0
-        text_to_parse = re.sub(r'[€$£¥\s]|m[³3]|L', '', text_to_parse, flags=re.I)
-        if ',' in text_to_parse and '.' in text_to_parse:
-             if text_to_parse.rfind('.') < text_to_parse.rfind(','): text_to_parse = text_to_parse.replace('.', '')
-        text_to_parse = text_to_parse.replace(',', '.')
-        match = re.search(r'([-+]?\d+\.?\d*|\.\d+)', text_to_parse)
-        if match:
-            try: return float(match.group(1))
-            except ValueError: pass
-        _LOGGER.debug("Could not extract number from: '%s' (cleaned: '%s')", text, text_to_parse); return None
+def _soup(text, parse_only=None):
+    """Parse HTML with BeautifulSoup, imported on first use (only fallbacks and the contracts page need it)."""
+    from bs4 import BeautifulSoup # pylint: disable=import-outside-toplevel
+    return BeautifulSoup(text, 'html.parser', parse_only=parse_only)
+
+
+def _raise_for_status(status, url):
+    """Raise an aiohttp ClientResponseError-like error for HTTP error codes."""
+    if status >= 400:
+        raise aiohttp.ClientError(f"HTTP {status} for {url}")
+
+
+class AiguesHortaAPI:
+    """Synchronous wrapper around AiguesHortaAsyncAPI (for scripts and tests).
+
+    Runs the async client on a private event loop; do not use inside Home Assistant's loop.
+    """
+
+    def __init__(self, username, password, base_url=BASE_URL):
+        """Initialize the API client."""
+        self._loop = asyncio.new_event_loop()
+        self._client = AiguesHortaAsyncAPI(username, password, base_url=base_url)
+
+    @property
+    def username(self): return self._client.username
+
+    def _run(self, coro): return self._loop.run_until_complete(coro)
+
+    def login(self):
+        """Login to the portal (blocking)."""
+        return self._run(self._client.async_login())
+
+    def get_consumption_data(self, days_back=2):
+        """Fetch consumption data of every contract (blocking)."""
+        return self._run(self._client.async_get_consumption_data(days_back))
+
+    def get_contracts(self):
+        """Get list of contracts (blocking)."""
+        return self._run(self._client.async_get_contracts())
+
+    def close(self):
+        """Close the underlying session and event loop."""
+        if self._loop.is_closed(): return
+        self._run(self._client.async_close())
+        self._loop.close()
 
 # --- END OF FILE aigues_horta_api.py ---
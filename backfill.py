@@ -0,0 +1,218 @@
+"""Resumable bulk backfill and on-demand range fetches of hourly history."""
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import BACKFILL_WINDOW_DAYS, DOMAIN, EVENT_FETCH_HISTORY_PROGRESS, STORAGE_VERSION
+from .stats import async_import_statistics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def split_windows(start: date, end: date, days: int = BACKFILL_WINDOW_DAYS):
+    """Split the inclusive range start..end into inclusive windows of at most `days` days."""
+    windows = []
+    while start <= end:
+        window_end = min(start + timedelta(days=days - 1), end)
+        windows.append((start, window_end))
+        start = window_end + timedelta(days=1)
+    return windows
+
+
+def missing_windows(start: date, end: date, covered, days: int = BACKFILL_WINDOW_DAYS):
+    """Split the days of start..end not in `covered` into inclusive windows of at most `days` days."""
+    windows = []; run_start = None; day = start
+    while day <= end + timedelta(days=1):
+        if day <= end and day not in covered:
+            if run_start is None: run_start = day
+        elif run_start is not None:
+            windows.extend(split_windows(run_start, day - timedelta(days=1), days)); run_start = None
+        day += timedelta(days=1)
+    return windows
+
+
+def merge_ranges(ranges):
+    """Merge inclusive (start, end) date ranges that overlap or touch; returns them sorted."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1): merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else: merged.append((start, end))
+    return merged
+
+
+def days_in_ranges(ranges, start: date, end: date) -> set:
+    """Return the days of start..end inside any of the inclusive (start, end) ranges."""
+    days = set()
+    for range_start, range_end in ranges:
+        day = max(range_start, start)
+        while day <= min(range_end, end): days.add(day); day += timedelta(days=1)
+    return days
+
+
+def months_ago(today: date, months: int) -> date:
+    """Return the first day of the month `months` months before today's month."""
+    month_index = today.year * 12 + today.month - 1 - months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class AiguesHortaBackfill:
+    """Walk a date range in bounded windows per contract, store the rows and import them as statistics.
+
+    Completed windows are persisted, so an interrupted job resumes where it stopped. The
+    complete days every fetched window covered (rows or not) are kept per contract, so a
+    later fetch_history skips them even where the portal has no data (before the contract
+    started, meter gaps).
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, coordinator) -> None:
+        """Initialize the backfill job runner."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._entry_id = entry_id
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self._fetched_store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.fetched")
+        self._fetched: dict | None = None # History key -> merged (start, end) ranges already fetched
+        self._job = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while a backfill task is active."""
+        return self._task is not None and not self._task.done()
+
+    async def async_start(self, start: date, end: date, parallel: int) -> None:
+        """Start a new backfill job in the background."""
+        if self.coordinator.history is None: raise HomeAssistantError("Hourly history store is not available.")
+        if self.running: raise HomeAssistantError("A backfill is already running for this entry.")
+        self._job = {"start": start.isoformat(), "end": end.isoformat(), "parallel": parallel, "done": [], "complete": False}
+        await self._store.async_save(self._job)
+        await self._async_load_fetched()
+        self._start_task()
+
+    async def async_resume(self) -> None:
+        """Resume an unfinished job saved by a previous run, if any."""
+        job = await self._store.async_load()
+        if not job or job.get("complete") or self.coordinator.history is None: return
+        self._job = job
+        await self._async_load_fetched()
+        _LOGGER.info("Resuming backfill %s - %s (%d windows done).", job["start"], job["end"], len(job["done"]))
+        self._start_task()
+
+    async def async_cancel(self) -> None:
+        """Stop the running task (progress stays saved)."""
+        if self.running:
+            self._task.cancel()
+            try: await self._task
+            except asyncio.CancelledError: pass
+
+    async def async_fetch_history(self, contract_key: str, start: date, end: date, parallel: int) -> dict:
+        """Fetch the days of start..end missing from the history store for one contract and wait for it.
+
+        Days already stored or fetched before are skipped (and days after the contract's
+        high-water mark, which the polls bring), so repeating a covered range makes no
+        portal request. Progress is logged and fired as EVENT_FETCH_HISTORY_PROGRESS after
+        each window; returns a summary with the rows ingested.
+        """
+        history = self.coordinator.history
+        if history is None: raise HomeAssistantError("Hourly history store is not available.")
+        history_key = self.coordinator.history_key(contract_key)
+        covered = await self.hass.async_add_executor_job(history.covered_days, history_key, start, end, self._high_water_mark(contract_key))
+        covered |= days_in_ranges((await self._async_load_fetched()).get(history_key, ()), start, end)
+        windows = missing_windows(start, end, covered)
+        summary = {"config_entry_id": self._entry_id, "contract": history_key, "start": start.isoformat(), "end": end.isoformat(),
+                   "windows": len(windows), "skipped_days": len(covered), "rows": 0, "failed_windows": 0}
+        if not windows:
+            _LOGGER.debug("History %s - %s of contract %s already stored; nothing to fetch.", start, end, history_key)
+            return summary
+
+        semaphore = asyncio.Semaphore(max(1, parallel)); done = 0
+
+        async def _async_window(window_start, window_end):
+            nonlocal done
+            async with semaphore:
+                try: rows = await self._async_fetch_window(contract_key, window_start, window_end)
+                except Exception as err: # Keep the other windows going; reported in the summary
+                    summary["failed_windows"] += 1
+                    _LOGGER.warning("Fetching %s - %s of contract %s failed: %s", window_start, window_end, history_key, err)
+                else: summary["rows"] += rows # Added after the await: windows finish concurrently
+                done += 1
+                _LOGGER.info("Fetch history %s: %d/%d windows, %d rows.", history_key, done, len(windows), summary["rows"])
+                self.hass.bus.async_fire(EVENT_FETCH_HISTORY_PROGRESS, {
+                    "config_entry_id": self._entry_id, "contract": history_key,
+                    "windows_done": done, "windows_total": len(windows), "rows": summary["rows"],
+                })
+
+        await asyncio.gather(*(_async_window(*w) for w in windows))
+        if summary["rows"]: summary["statistics"] = await async_import_statistics(self.hass, self.coordinator, contract_key, full=True)
+        return summary
+
+    async def _async_fetch_window(self, contract_key, window_start: date, window_end: date) -> int:
+        """Stream one window of a contract into the history store; returns the rows written."""
+        history = self.coordinator.history; history_key = self.coordinator.history_key(contract_key); count = 0
+        async for rows in self.coordinator.api.async_iter_hourly_range(window_start, window_end, contract=contract_key or None):
+            await self.hass.async_add_executor_job(history.write, history_key, rows) # Write as it streams
+            count += len(rows)
+        _LOGGER.debug("Fetched contract %s %s - %s: %d rows.", history_key, window_start, window_end, count)
+        # Only days before the high-water mark's are complete on the portal
+        mark = self._high_water_mark(contract_key)
+        last_day = min(window_end, (mark.date() if mark else date.today()) - timedelta(days=1))
+        if window_start <= last_day:
+            self._fetched[history_key] = merge_ranges([*self._fetched.get(history_key, ()), (window_start, last_day)])
+            self._fetched_store.async_delay_save(self._export_fetched, 5)
+        return count
+
+    def _high_water_mark(self, contract_key):
+        series = self.coordinator.api.series.get(contract_key)
+        return series.high_water_mark if series else None
+
+    async def _async_load_fetched(self) -> dict:
+        """Return the fetched ranges per history key, loading them on first use."""
+        if self._fetched is None:
+            stored = await self._fetched_store.async_load() or {}
+            try: self._fetched = {key: [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in ranges] for key, ranges in stored.items()}
+            except (TypeError, ValueError) as err:
+                _LOGGER.warning("Ignoring invalid stored fetched ranges: %s", err); self._fetched = {}
+        return self._fetched
+
+    def _export_fetched(self) -> dict:
+        return {key: [[s.isoformat(), e.isoformat()] for s, e in ranges] for key, ranges in self._fetched.items()}
+
+    def _start_task(self) -> None:
+        self._task = self.hass.async_create_background_task(self._async_run(), f"{DOMAIN} backfill")
+
+    async def _async_run(self) -> None:
+        job = self._job
+        done = set(job["done"])
+        contract_keys = self.coordinator.contract_keys
+        windows = [
+            (key, window_start, window_end)
+            for key in contract_keys
+            for window_start, window_end in split_windows(date.fromisoformat(job["start"]), date.fromisoformat(job["end"]))
+            if f"{key}|{window_start.isoformat()}" not in done
+        ]
+        semaphore = asyncio.Semaphore(max(1, job["parallel"]))
+
+        async def _async_window(key, window_start, window_end):
+            async with semaphore:
+                await self._async_fetch_window(key, window_start, window_end)
+                job["done"].append(f"{key}|{window_start.isoformat()}")
+                self._store.async_delay_save(lambda: job, 5)
+
+        results = await asyncio.gather(*(_async_window(*w) for w in windows), return_exceptions=True)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            _LOGGER.warning("Backfill incomplete: %d of %d windows failed (first error: %s); it will resume on next start.",
+                            len(failures), len(windows), failures[0])
+            await self._store.async_save(job)
+            return
+
+        imported = 0
+        for key in contract_keys:
+            imported += await async_import_statistics(self.hass, self.coordinator, key, full=True)
+        job["complete"] = True
+        await self._store.async_save(job)
+        _LOGGER.info("Backfill %s - %s complete; %d hourly statistics imported.", job["start"], job["end"], imported)
@@ -0,0 +1,97 @@
+"""Binary sensor platform for Aigües de l'Horta integration (leak alarms)."""
+import logging
+from typing import Any, Dict, Optional
+
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN
+from .leak import ALARM_CONTINUOUS_FLOW, ALARM_NIGHT_FLOW, ALARMS
+from .sensor import AiguesHortaContractEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+ALARM_NAMES = {ALARM_CONTINUOUS_FLOW: "Continuous Flow", ALARM_NIGHT_FLOW: "Night Flow"}
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Aigües de l'Horta leak binary sensors."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    known_keys = set()
+
+    def _contract_sensors():
+        """Return sensors for contracts not seen before (the primary one keeps contract-less unique ids)."""
+        new_sensors = []
+        for index, key in enumerate(coordinator.contract_keys):
+            if key in known_keys: continue
+            known_keys.add(key)
+            new_sensors += [AiguesHortaLeakSensor(coordinator, entry, alarm, key if index else None) for alarm in ALARMS]
+        return new_sensors
+
+    async_add_entities(_contract_sensors())
+
+    @callback
+    def _async_add_new_contracts() -> None:
+        if new_sensors := _contract_sensors(): async_add_entities(new_sensors)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_contracts))
+
+
+class AiguesHortaLeakSensor(AiguesHortaContractEntity, BinarySensorEntity):
+    """On while a contract's hourly consumption looks like a leak (see leak.LeakDetector)."""
+
+    _attr_has_entity_name = True
+    _attr_device_class = BinarySensorDeviceClass.MOISTURE
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, alarm: str, contract_key: Optional[str] = None) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, entry, contract_key)
+        self._alarm = alarm
+        self._attr_unique_id = self._unique_id(f"leak_{alarm}")
+        contract_data = self._contract_data()
+        contract_id = (contract_data.get("contract_number") or entry.entry_id) if contract_data else entry.entry_id
+        base_name = self._base_name()
+        self._attr_name = f"{base_name} {ALARM_NAMES[alarm]}"
+        self._attr_device_info = { # Link to the same device
+            "identifiers": {(DOMAIN, contract_id)}, "name": base_name,
+            "manufacturer": "Aigües de l'Horta",
+            "model": f"Meter ({contract_id})" if contract_id != entry.entry_id else "Meter",
+        }
+
+    def _detector(self):
+        key = self.coordinator.contract_keys[0] if self._contract_key is None else self._contract_key
+        return self.coordinator.leak_detectors.get(key)
+
+    @property
+    def native_value(self) -> Optional[bool]:
+        """Return the alarm state (compared by _async_write_state_if_changed)."""
+        return self.is_on
+
+    @property
+    def is_on(self) -> Optional[bool]:
+        """Return True while the alarm is raised (None until the first poll)."""
+        detector = self._detector()
+        return detector.active[self._alarm] if detector else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the running leak indicators (m³ per hour)."""
+        detector = self._detector()
+        if detector is None: return {}
+        return {
+            "consecutive_flow_hours": detector.flow_hours,
+            "flow_since": detector.flow_since.isoformat(timespec='seconds') if detector.flow_since else None,
+            "night_min_flow": detector.night_min,
+            "baseline_flow": round(detector.baseline, 6) if detector.baseline is not None else None,
+            "last_updated_hour": detector.newest.isoformat(timespec='seconds') if detector.newest else None,
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data."""
+        self._async_write_state_if_changed()
@@ -5,12 +5,17 @@ from typing import Any, Dict, Optional
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
-from .const import DOMAIN
-from .aigues_horta_api import AiguesHortaAPI
+from . import async_create_api, async_stash_flow_client
+from .const import (
+    CONF_BASE_URL, CONF_HISTORY_ATTRIBUTE, CONF_MAX_CONCURRENCY,
+    DEFAULT_HISTORY_ATTRIBUTE, DEFAULT_MAX_CONCURRENCY, DOMAIN,
+)
+from .aigues_horta_api import BASE_URL
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,34 +25,51 @@ DATA_SCHEMA = vol.Schema(
         vol.Required("password"): str,
     }
 )
+ADVANCED_DATA_SCHEMA = DATA_SCHEMA.extend({vol.Optional(CONF_BASE_URL, default=BASE_URL): str})
+REAUTH_SCHEMA = vol.Schema({vol.Required("password"): str})
+
 
+async def validate_input(hass: HomeAssistant, data: dict, options: dict | None = None) -> dict:
+    """Validate the user input allows us to connect.
 
-async def validate_input(hass: HomeAssistant, data: dict) -> dict:
-    """Validate the user input allows us to connect."""
+    Returns the entry title and the logged-in client, which entry setup reuses
+    (built with the entry's `options` when re-authenticating an existing entry).
+    """
     
-    api = AiguesHortaAPI(data["username"], data["password"])
+    api = async_create_api(hass, data, options)
     
     try:
         # Test the login credentials
-        await hass.async_add_executor_job(api.login)
+        await api.async_login()
+    except UpdateFailed as err: # Portal unreachable, not a credentials problem
+        _LOGGER.error("Error connecting to the portal: %s", err)
+        await api.async_close(given_session=True)
+        raise CannotConnect from err
     except Exception as err:
         _LOGGER.error("Error validating login: %s", err)
+        await api.async_close(given_session=True)
         raise InvalidAuth from err
     
-    # Get account info for title
+    # Get account info for title (the contracts it loads are kept for the first poll)
     try:
-        account_info = await hass.async_add_executor_job(api.get_account_info)
+        account_info = await api.async_get_account_info()
         title = account_info.get("name", data["username"])
     except Exception:
         title = data["username"]
     
-    return {"title": title}
+    return {"title": title, "api": api}
 
 
 class AiguesHortaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Aigües de l'Horta."""
 
     VERSION = 1
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow."""
+        return AiguesHortaOptionsFlow(config_entry)
     
     async def async_step_user(self, user_input=None) -> FlowResult:
         """Handle the initial step."""
@@ -57,7 +79,10 @@ class AiguesHortaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             try:
                 info = await validate_input(self.hass, user_input)
                 
+                async_stash_flow_client(self.hass, info["api"]) # Setup skips a second login
                 return self.async_create_entry(title=info["title"], data=user_input)
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
             except InvalidAuth:
                 errors["base"] = "invalid_auth"
             except Exception:  # pylint: disable=broad-except
@@ -65,9 +90,73 @@ class AiguesHortaConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
                 
         return self.async_show_form(
-            step_id="user", data_schema=DATA_SCHEMA, errors=errors
+            step_id="user", data_schema=ADVANCED_DATA_SCHEMA if self.show_advanced_options else DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_reauth(self, entry_data) -> FlowResult:
+        """Handle the portal rejecting the stored credentials."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(self, user_input=None) -> FlowResult:
+        """Ask for the new password and reload the entry with it."""
+        errors = {}
+        entry = self._reauth_entry
+
+        if user_input is not None:
+            data = {**entry.data, "password": user_input["password"]}
+            try:
+                info = await validate_input(self.hass, data, entry.options)
+
+                async_stash_flow_client(self.hass, info["api"]) # The reload skips a second login
+                self.hass.config_entries.async_update_entry(entry, data=data)
+                await self.hass.config_entries.async_reload(entry.entry_id)
+                return self.async_abort(reason="reauth_successful")
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+
+        return self.async_show_form(
+            step_id="reauth_confirm", data_schema=REAUTH_SCHEMA, errors=errors,
+            description_placeholders={"username": entry.data["username"]},
+        )
+
+
+class AiguesHortaOptionsFlow(config_entries.OptionsFlow):
+    """Handle Aigües de l'Horta options."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_MAX_CONCURRENCY,
+                    default=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=10)),
+                vol.Optional(
+                    CONF_HISTORY_ATTRIBUTE,
+                    default=options.get(CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE),
+                ): bool,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
+
 
 class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
+
+
+class CannotConnect(HomeAssistantError):
+    """Error to indicate the portal could not be reached."""
@@ -7,7 +7,71 @@ NAME = "Aigües de l'Horta"
 VERSION = "0.1.3" # Increment version
 
 DEFAULT_SCAN_INTERVAL = timedelta(hours=1)
-PLATFORMS = ["sensor"] # Only sensor platform
+DEFAULT_DAYS_BACK = 2 # Hourly window published to the sensors
+
+# Config (advanced: portal address, e.g. a local stand-in portal for load tests)
+CONF_BASE_URL = "base_url"
+
+# Options
+CONF_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_MAX_CONCURRENCY = 4 # Contracts polled at the same time
+CONF_HISTORY_ATTRIBUTE = "history_attribute"
+DEFAULT_HISTORY_ATTRIBUTE = True # Off: history only via the websocket API / statistics
+PLATFORMS = ["sensor", "binary_sensor"]
+
+# Persistent storage (.storage/aigues_horta.<entry_id>)
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10 # Seconds; coalesces writes after each poll
+
+# Local hourly history (SQLite, in the HA config dir)
+HISTORY_DB_FILE = "aigues_horta_history.db"
+HISTORY_RETENTION_DAYS = 3 * 365
+HISTORY_COMPACT_INTERVAL = timedelta(days=7)
+
+# Shared request scheduler (all entries)
+SCHEDULER_MAX_CONCURRENCY = 4 # Portal requests in flight at once
+SCHEDULER_RATE = 2.0 # Portal requests per second
+SCHEDULER_BURST = 5
+REFRESH_JITTER = timedelta(minutes=2)
+CONTRACTS_CACHE_TTL = timedelta(hours=24) # Contracts page re-checked after this (parsed only if it changed)
+CONTRACTS_RETRY_DELAY = timedelta(minutes=15) # Wait after a failed contracts fetch
+FLOW_CLIENT_TTL = timedelta(minutes=5) # A config flow's logged-in client is reused by setup within this time
+
+# Retries and circuit breaker for transient portal errors
+REQUEST_ATTEMPTS = 3 # Tries per request on network errors, 429 and 5xx
+RETRY_BASE_DELAY = 1.0 # Seconds; doubled per retry, randomized (full jitter)
+RETRY_MAX_DELAY = 30.0
+BREAKER_FAILURE_THRESHOLD = 5 # Consecutive failures that open the circuit
+BREAKER_RESET_TIMEOUT = timedelta(minutes=1) # First pause before a probe
+BREAKER_MAX_RESET_TIMEOUT = timedelta(minutes=30)
+
+# Adaptive polling around the learnt publication time
+POLL_MIN_INTERVAL = timedelta(minutes=10) # Inside the publication window
+POLL_MAX_INTERVAL = timedelta(hours=3) # Longest wait (early or overdue)
+POLL_WINDOW = timedelta(minutes=30) # Frequent polls after the expected publication
+SIGNAL_POLL_DONE = f"{DOMAIN}_poll_done_{{}}" # .format(entry_id); sent after every poll, even an unchanged one
+
+# Leak detection (per contract, over the hourly consumption)
+LEAK_CONTINUOUS_HOURS = 24 # Hours in a row with consumption that raise the continuous-flow alarm
+LEAK_NIGHT_HOURS = (2, 5) # Local night window [first, end) expected to have zero use
+LEAK_NIGHT_MIN_FLOW = 0.001 # m³/h (1 L/h) flowing through every night hour raises the night-flow alarm
+LEAK_BASELINE_ALPHA = 0.05 # EWMA weight of each new hour in the consumption baseline
+EVENT_LEAK = f"{DOMAIN}_leak" # Fired when a leak alarm turns on or off
+
+# Services
+SERVICE_BACKFILL_STATISTICS = "backfill_statistics"
+SERVICE_FETCH_HISTORY = "fetch_history"
+EVENT_FETCH_HISTORY_PROGRESS = f"{DOMAIN}_fetch_history_progress"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_CONTRACT = "contract"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_MONTHS = "months"
+ATTR_PARALLEL = "parallel"
+DEFAULT_BACKFILL_MONTHS = 12
+DEFAULT_BACKFILL_PARALLEL = 2
+BACKFILL_WINDOW_DAYS = 7 # 168 rows, fits one API page
+FETCH_HISTORY_MAX_DAYS = 5 * 366 # Longest range of one fetch_history call
 
 # Attributes
 ATTR_CONTRACT_NUMBER = "contract_number"
@@ -17,5 +81,5 @@ ATTR_NEXT_READING_DATE = "next_reading_date" # (Not currently extracted)
 ATTR_CONSUMPTION_CURRENT = "consumption_current" # Not used as attribute, it's the native_value
 ATTR_CONSUMPTION_PREVIOUS = "consumption_previous" # (Placeholder)
 ATTR_CONSUMPTION_YEARLY = "consumption_yearly" # (Placeholder)
-ATTR_HOURLY_CONSUMPTION = "hourly_consumption" # Key for the hourly history dict attribute
+ATTR_HOURLY_CONSUMPTION = "hourly_consumption" # Key of the hourly HourlySeries in the coordinator data
 # --- END OF FILE const.py ---
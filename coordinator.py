@@ -0,0 +1,247 @@
+"""Data update coordinator for the Aigües de l'Horta integration."""
+import logging
+import sqlite3
+from datetime import datetime, time, timedelta
+from operator import itemgetter
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CONFIG_ENTRY_ID, ATTR_CONTRACT, DEFAULT_DAYS_BACK, DEFAULT_SCAN_INTERVAL, DOMAIN, EVENT_LEAK,
+    LEAK_BASELINE_ALPHA, LEAK_CONTINUOUS_HOURS, LEAK_NIGHT_HOURS, LEAK_NIGHT_MIN_FLOW, POLL_MAX_INTERVAL,
+    POLL_MIN_INTERVAL, POLL_WINDOW, SIGNAL_POLL_DONE, STORAGE_SAVE_DELAY, STORAGE_VERSION,
+)
+from .aggregates import PeriodTotals, seed_start
+from .aigues_horta_api import AiguesHortaAsyncAPI
+from .history import HourlyHistoryStore
+from .leak import LeakDetector
+from .polling import PublicationModel
+from .series import HourlySeries
+from .stats import async_import_statistics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class AiguesHortaCoordinator(DataUpdateCoordinator):
+    """Coordinator that polls the portal and persists the incremental fetch state."""
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, api: AiguesHortaAsyncAPI,
+        history: HourlyHistoryStore | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        # No own timer: the shared RefreshScheduler triggers refreshes in this entry's phase
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=None,
+            always_update=False, # Listeners only run when the data changed (see _async_poll)
+        )
+        self.poll_interval = DEFAULT_SCAN_INTERVAL # Until the publication cadence is learnt
+        self.polling = PublicationModel(POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_WINDOW)
+        self.api = api
+        self.history = history
+        self.period_totals: dict[str, PeriodTotals] = {} # Contract key -> running day/week/month totals
+        self.leak_detectors: dict[str, LeakDetector] = {} # Contract key -> leak indicators
+        self._entry = entry
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+        self._session_store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.session")
+
+    @property
+    def contract_keys(self) -> list:
+        """Return the contract keys of the last update (primary first)."""
+        if not self.data: return list(self.api.series) or [""]
+        primary = self.data.get("primary", "")
+        return [primary] + [key for key in self.data.get("contracts", {}) if key != primary]
+
+    def history_key(self, contract_key: str | None = None) -> str:
+        """Return the history store key of a contract (the primary one by default).
+
+        Contract number when known, else the entry id.
+        """
+        if contract_key is None: contract_key = self.contract_keys[0]
+        return contract_key or self._entry.entry_id
+
+    async def async_load_state(self) -> bool:
+        """Restore the fetch state and seed the data with the last successful result.
+
+        Returns True if the entities can start from that snapshot (no live poll needed first).
+        """
+        stored = await self._store.async_load()
+        if not stored: return False
+        self.api.restore_state(stored)
+        self.polling.restore(stored.get("polling"))
+        tz = dt_util.get_default_time_zone()
+        for key, state in (stored.get("period_totals") or {}).items():
+            totals = PeriodTotals.from_dict(tz, state)
+            if totals is not None: self.period_totals[key] = totals
+        for key, state in (stored.get("leak_detectors") or {}).items():
+            detector = self._new_leak_detector()
+            if detector.restore(state): self.leak_detectors[key] = detector
+        data = self.api.restore_result(stored.get("snapshot_contracts") or [])
+        if data is None: return False
+        await self._async_attach_history(data)
+        self.async_set_updated_data(data)
+        _LOGGER.debug("Seeded %s from the stored snapshot (newest hour %s).", self._entry.title, self.polling.newest)
+        return True
+
+    def _export_state(self) -> dict:
+        # Contract details of the last result, so a restart can rebuild it (restore_result)
+        contracts = [
+            {"contract_number": key, "address": self.data["contracts"][key].get("address")}
+            for key in self.contract_keys if key
+        ] if self.data else []
+        return {
+            **self.api.export_state(), "polling": self.polling.as_dict(), "snapshot_contracts": contracts,
+            "period_totals": {key: totals.as_dict() for key, totals in self.period_totals.items()},
+            "leak_detectors": {key: detector.as_dict() for key, detector in self.leak_detectors.items()},
+        }
+
+    async def async_start(self, logged_in: bool = False) -> None:
+        """Log in and run the first live refresh (background task while the snapshot is shown)."""
+        try: await self.async_authenticate(logged_in)
+        except ConfigEntryAuthFailed as err: # Credentials rejected: no refresh (it would log in again) until reauth
+            _LOGGER.error("Login for %s rejected: %s", self._entry.title, err)
+            self._entry.async_start_reauth(self.hass)
+            return
+        except UpdateFailed as err: # Portal unavailable: the refresh logs in again on its own
+            _LOGGER.warning("Login for %s failed, the next refresh will retry: %s", self._entry.title, err)
+        await self.async_refresh()
+
+    def next_refresh_delay(self) -> timedelta | None:
+        """Return the adaptive wait until the next poll, or None to use the fixed interval.
+
+        While the portal circuit is open the poll waits at least until the probe is due.
+        """
+        delay = self.polling.next_delay(datetime.now())
+        retry_in = timedelta(seconds=self.api.breaker.retry_in())
+        if retry_in and (delay is None or delay < retry_in): return retry_in
+        return delay
+
+    async def async_authenticate(self, logged_in: bool = False) -> None:
+        """Resume the stored portal session, doing a full login only if it has expired.
+
+        With `logged_in` (client handed over by the config flow) the session is only saved.
+        """
+        if not logged_in:
+            stored = await self._session_store.async_load()
+            if self.api.restore_session(stored) and await self.api.async_validate_session(): return
+            await self.api.async_login()
+        await self._session_store.async_save(self.api.export_session())
+
+    async def async_get_history(self, start: datetime | None = None, end: datetime | None = None, contract_key: str | None = None):
+        """Return stored [(datetime, consumption, reading)] rows of a contract for start <= ts < end."""
+        if self.history is None: return []
+        return await self.hass.async_add_executor_job(self.history.range, self.history_key(contract_key), start, end)
+
+    async def _async_update_data(self):
+        """Fetch data from API."""
+        try: return await self._async_poll()
+        finally: # Timings and counters change on every poll, unlike the data the listeners get
+            async_dispatcher_send(self.hass, SIGNAL_POLL_DONE.format(self._entry.entry_id))
+
+    async def _async_poll(self):
+        try:
+            data = await self.api.async_get_consumption_data(DEFAULT_DAYS_BACK)
+        except (UpdateFailed, ConfigEntryAuthFailed): # Auth failure: HA starts the reauth flow
+            raise
+        except Exception as err:
+            _LOGGER.error("Error fetching Aigües de l'Horta data: %s", err)
+            raise UpdateFailed(f"Error fetching data: {err}") from err
+        marks = [series.high_water_mark for series in self.api.series.values() if series.high_water_mark]
+        if not self.polling.observe(datetime.now(), max(marks, default=None)): _LOGGER.debug("Poll brought no new hours.")
+        _LOGGER.debug("Publication cadence: %s", self.polling.stats())
+        self._store.async_delay_save(self._export_state, STORAGE_SAVE_DELAY)
+        self._session_store.async_delay_save(self.api.export_session, STORAGE_SAVE_DELAY) # Cookies may be refreshed
+
+        if data is self.data: # Unchanged API payloads: nothing new to store, import or write to the sensors
+            await self._async_update_aggregates(data) # Only seeds contracts without totals
+            return data
+
+        history_ok = await self._async_attach_history(data)
+        await self._async_update_aggregates(data)
+        if history_ok:
+            for key, series in self.api.series.items():
+                if series.new_rows: await self._async_import_statistics(key)
+        return data
+
+    async def _async_attach_history(self, data) -> bool:
+        """Store the new rows and publish each contract's window from the history store; False if unavailable."""
+        if self.history is None: return False
+        try:
+            windows = await self.hass.async_add_executor_job(self._sync_history, dict(self.api.series))
+        except sqlite3.Error as err:
+            _LOGGER.warning("Hourly history store unavailable: %s", err)
+            return False
+        for key, window in windows.items():
+            if key in data["contracts"]: data["contracts"][key]["hourly_consumption"] = window
+        if data["primary"] in windows: data["hourly_consumption"] = windows[data["primary"]]
+        return True
+
+    def _new_leak_detector(self) -> LeakDetector:
+        return LeakDetector(
+            dt_util.get_default_time_zone(), LEAK_CONTINUOUS_HOURS, LEAK_NIGHT_HOURS, LEAK_NIGHT_MIN_FLOW, LEAK_BASELINE_ALPHA,
+        )
+
+    async def _async_update_aggregates(self, data) -> None:
+        """Add the new rows to each contract's period totals and leak detector.
+
+        A contract seen for the first time is seeded from the stored hours (else the
+        published window) without firing leak events for that past.
+        """
+        for key, series in self.api.series.items():
+            totals = self.period_totals.get(key); detector = self.leak_detectors.get(key)
+            if totals is not None and detector is not None:
+                rows = sorted(series.new_rows, key=itemgetter(0))
+                totals.add_rows(rows)
+                for alarm, active in detector.add_rows(rows): self._fire_leak_event(key, alarm, active, detector)
+                continue
+            # --- First poll of a contract: rebuild the state from history (else the published window) ---
+            start = datetime.combine(seed_start(dt_util.now().date()), time())
+            rows = None
+            if self.history is not None:
+                try: rows = await self.async_get_history(start, contract_key=key)
+                except sqlite3.Error as err: _LOGGER.warning("Hourly history store unavailable: %s", err)
+            if not rows:
+                contract = data["contracts"].get(key) or (data if key == data["primary"] else {})
+                rows = list(contract.get("hourly_consumption") or ())
+            if totals is None:
+                totals = self.period_totals[key] = PeriodTotals(dt_util.get_default_time_zone())
+                _LOGGER.debug("Seeded period totals of %s with %d rows.", key or self._entry.title, totals.add_rows(rows))
+            if detector is None:
+                detector = self.leak_detectors[key] = self._new_leak_detector()
+                detector.add_rows(rows)
+
+    def _fire_leak_event(self, contract_key: str, alarm: str, active: bool, detector: LeakDetector) -> None:
+        _LOGGER.log(logging.WARNING if active else logging.INFO, "Leak alarm %s %s for contract %s.", alarm, "raised" if active else "cleared", contract_key or self._entry.title)
+        self.hass.bus.async_fire(EVENT_LEAK, {
+            ATTR_CONFIG_ENTRY_ID: self._entry.entry_id, ATTR_CONTRACT: contract_key,
+            "alarm": alarm, "active": active, "hour": detector.newest.isoformat(),
+            "flow_hours": detector.flow_hours, "night_min_flow": detector.night_min, "baseline": detector.baseline,
+        })
+
+    async def _async_import_statistics(self, contract_key: str) -> None:
+        """Append the new hours of a contract to the long-term statistics."""
+        try:
+            await async_import_statistics(self.hass, self, contract_key)
+        except Exception as err: # Recorder not ready/misconfigured must not fail the poll
+            _LOGGER.warning("Could not import hourly statistics: %s", err)
+
+    def _sync_history(self, series_by_key):
+        """Write each contract's new rows and read back its published window as an HourlySeries (executor)."""
+        windows = {}
+        for key, series in series_by_key.items():
+            history_key = self.history_key(key)
+            self.history.write(history_key, series.new_rows)
+            mark = series.high_water_mark
+            if mark is None: continue
+            rows = self.history.range(history_key, mark - timedelta(days=DEFAULT_DAYS_BACK), mark + timedelta(hours=1))
+            windows[key] = HourlySeries.from_rows(row for row in rows if row[1] is not None)
+        return windows
@@ -0,0 +1,147 @@
+"""Batch decoder for the hourly `consumos` rows of the portal API.
+
+Locale-independent: Spanish month names come from a fixed table, so the process
+locale is never read or changed.
+"""
+import json
+import logging
+import re
+from datetime import date, datetime, timedelta
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fixed Spanish month table (first three letters, accents stripped)
+SPANISH_MONTHS = {
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'sep': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dic': 12,
+}
+_ACCENTS = str.maketrans('áéíóú', 'aeiou')
+
+_DATE_RE = re.compile(r'\s*(\d{1,2})[\s/-]+([a-zA-Záéíóú]+)\.?[\s/-]+(\d{4})', re.I)
+_HOUR_RE = re.compile(r'\s*(\d{1,2}):(\d{2})')
+_NUMBER_STRIP_RE = re.compile(r'[€$£¥\s]|m[³3]|L', re.I)
+_NUMBER_RE = re.compile(r'[-+]?\d+\.?\d*|\.\d+')
+_DAY = timedelta(days=1)
+
+
+def parse_spanish_date(fecha):
+    """Return the date of a 'DD mon YYYY' string (Spanish month name), or None."""
+    match = _DATE_RE.match(str(fecha))
+    if not match: return None
+    day, month_str, year = match.groups()
+    month = SPANISH_MONTHS.get(month_str.lower().translate(_ACCENTS)[:3])
+    if not month: _LOGGER.warning("Could not map Spanish month name: '%s'", month_str); return None
+    try: return date(int(year), month, int(day))
+    except ValueError: _LOGGER.warning("Invalid date components: '%s'", fecha); return None
+
+
+def parse_hour(hora):
+    """Return (hour, minute) of an 'HH:MM' string, or None; '24:00' is returned as (24, 0) (end of the day)."""
+    match = _HOUR_RE.match(str(hora))
+    if not match: return None
+    hour, minute = int(match.group(1)), int(match.group(2))
+    return (hour, minute) if minute < 60 and (hour < 24 or (hour, minute) == (24, 0)) else None
+
+
+def parse_number(text):
+    """Extract a numeric value, handling comma/dot decimals and thousand separators."""
+    if text is None: return None
+    if isinstance(text, (int, float)): return float(text)
+    cleaned = _NUMBER_STRIP_RE.sub('', str(text))
+    if not cleaned: # Blank cell is 0, a unit alone is not a number
+        if not str(text).strip(): return 0.0
+        _LOGGER.debug("No number in: '%s'", text); return None
+    if ',' in cleaned:
+        if '.' in cleaned and cleaned.rfind('.') < cleaned.rfind(','): cleaned = cleaned.replace('.', '')
+        cleaned = cleaned.replace(',', '.')
+    match = _NUMBER_RE.search(cleaned)
+    if match:
+        try: return float(match.group(0))
+        except ValueError: pass
+    _LOGGER.debug("Could not extract number from: '%s' (cleaned: '%s')", text, cleaned); return None
+
+
+def decode_consumos(consumos, after: datetime | None = None):
+    """Decode a raw `consumos` list in one pass.
+
+    Returns (timestamps, consumptions, readings) columns of equal length, in input
+    order: naive local datetimes and floats (None when missing). '24:00' is 00:00 of
+    the next day and an unreadable hour counts as 00:00 (as the portal client always
+    did, with a warning). Malformed rows and rows at or before `after` are skipped
+    (their numbers are not parsed). Dates and hours are parsed once per distinct
+    string, so a day's 24 rows share one parse.
+    """
+    timestamps, consumptions, readings = [], [], []
+    if not isinstance(consumos, list): return timestamps, consumptions, readings
+    date_memo, hour_memo = {}, {}
+    skip_before = after.date() if after is not None else None
+    bad = bad_hours = 0
+    for entry in consumos:
+        if not isinstance(entry, dict): bad += 1; continue
+        fecha = entry.get("fechaConsumo"); hora = entry.get("horaConsumo")
+        if not (fecha and hora): bad += 1; continue
+        day = date_memo.get(fecha)
+        if day is None and fecha not in date_memo: day = date_memo[fecha] = parse_spanish_date(fecha)
+        if day is None: bad += 1; continue
+        if skip_before is not None and day < skip_before: continue # Whole day already ingested
+        hour = hour_memo.get(hora)
+        if hour is None and hora not in hour_memo: hour = hour_memo[hora] = parse_hour(hora)
+        if hour is None: bad_hours += 1; hour = (0, 0)
+        if hour[0] == 24: current_dt = datetime(day.year, day.month, day.day) + _DAY
+        else: current_dt = datetime(day.year, day.month, day.day, hour[0], hour[1])
+        if after is not None and current_dt <= after: continue # Already ingested
+        timestamps.append(current_dt)
+        consumptions.append(parse_number(entry.get("consumo")))
+        readings.append(parse_number(entry.get("lectura")))
+    if bad: _LOGGER.warning("Skipped %d malformed consumos row(s).", bad)
+    if bad_hours: _LOGGER.warning("Used 00:00 for %d consumos row(s) with an unreadable hour.", bad_hours)
+    return timestamps, consumptions, readings
+
+
+_CONSUMOS_KEY_RE = re.compile(r'"consumos"\s*:\s*\[')
+_KEY_TAIL = 32 # Text kept between chunks while looking for the key
+_SEPARATORS = ' \t\r\n,'
+
+
+class ConsumosStream:
+    """Incrementally extract the entries of the "consumos" array from JSON text fed in chunks.
+
+    Only the not yet decoded tail is buffered, so memory does not grow with the
+    payload size. Raises ValueError when the text is not a JSON object.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self.found = False # The "consumos" array was seen
+        self.complete = False # Its closing bracket was seen
+
+    def feed(self, text: str) -> list:
+        """Add text; return the entries completed by it."""
+        if self.complete or not text: return []
+        buffer = self._buffer + text
+        if not self._started:
+            stripped = buffer.lstrip()
+            if not stripped: self._buffer = ""; return []
+            if stripped[0] != '{': raise ValueError(f"Not a JSON object: {stripped[:40]!r}")
+            self._started = True
+        if not self.found:
+            match = _CONSUMOS_KEY_RE.search(buffer)
+            if not match: self._buffer = buffer[-_KEY_TAIL:]; return []
+            self.found = True; buffer = buffer[match.end():]
+        entries = []; pos = 0; end = len(buffer)
+        while True:
+            while pos < end and buffer[pos] in _SEPARATORS: pos += 1
+            if pos >= end: break
+            if buffer[pos] == ']': self.complete = True; break
+            try: entry, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError: break # Entry continues in the next chunk
+            entries.append(entry)
+        self._buffer = "" if self.complete else buffer[pos:]
+        return entries
+
+    def close(self) -> None:
+        """Check the end of the input; raises ValueError if the array was cut short."""
+        if self.found and not self.complete: raise ValueError(f"Truncated consumos array ({len(self._buffer)} characters left)")
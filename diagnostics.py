@@ -0,0 +1,38 @@
+"""Diagnostics support for the Aigües de l'Horta integration."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import ATTR_ADDRESS, DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, ATTR_ADDRESS}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return poll timings, request counters and fetch state of a config entry."""
+    entry_data = hass.data.get(DOMAIN, {}).get(entry.entry_id) or {}
+    coordinator = entry_data.get("coordinator")
+    diagnostics = {"entry": {"data": async_redact_data(dict(entry.data), TO_REDACT), "options": dict(entry.options)}}
+    if coordinator is None: return diagnostics
+
+    api = coordinator.api
+    gate = hass.data[DOMAIN].get("request_gate")
+    diagnostics.update({
+        "last_update_success": coordinator.last_update_success,
+        "metrics": api.metrics.as_dict(),
+        "request_gate": gate.stats(api.username) if gate else None,
+        "circuit_breaker": api.breaker.stats(),
+        "polling": coordinator.polling.stats(),
+        "contracts": {
+            key: {
+                "high_water_mark": series.high_water_mark.isoformat() if series.high_water_mark else None,
+                "retained_hours": len(series.hourly_consumption),
+                "leak_detector": coordinator.leak_detectors[key].as_dict() if key in coordinator.leak_detectors else None,
+            }
+            for key, series in api.series.items()
+        },
+    })
+    return diagnostics
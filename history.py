@@ -0,0 +1,133 @@
+"""Persistent local time-series store for hourly consumption (SQLite)."""
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+_LOGGER = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly (
+    contract TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    consumption REAL,
+    reading REAL,
+    PRIMARY KEY (contract, hour)
+) WITHOUT ROWID
+"""
+
+
+def to_epoch_hour(dt: datetime) -> int:
+    """Return the number of whole wall-clock hours between 1970-01-01 and a naive local datetime."""
+    return int((dt - _EPOCH).total_seconds()) // 3600
+
+
+def from_epoch_hour(hour: int) -> datetime:
+    """Inverse of to_epoch_hour (naive local wall-clock datetime)."""
+    return _EPOCH + timedelta(hours=hour)
+
+
+class HourlyHistoryStore:
+    """On-disk store of (hour, consumption, reading) rows per contract.
+
+    Blocking: call from an executor job inside Home Assistant.
+    """
+
+    def __init__(self, path):
+        """Initialize the store (the database is opened on first use)."""
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.commit()
+            _LOGGER.debug("Opened hourly history store: %s", self.path)
+        return self._conn
+
+    def write(self, contract, rows) -> int:
+        """Insert or replace rows of (datetime, consumption, reading); returns the row count."""
+        values = [(contract, to_epoch_hour(dt), consumption, reading) for dt, consumption, reading in rows]
+        if not values: return 0
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO hourly VALUES (?, ?, ?, ?)", values)
+        return len(values)
+
+    def range(self, contract, start: datetime | None = None, end: datetime | None = None):
+        """Return [(datetime, consumption, reading)] with start <= ts < end, oldest first."""
+        start_hour = to_epoch_hour(start) if start else -(1 << 62)
+        end_hour = to_epoch_hour(end) if end else 1 << 62
+        with self._lock:
+            cursor = self._connection().execute(
+                "SELECT hour, consumption, reading FROM hourly WHERE contract = ? AND hour >= ? AND hour < ? ORDER BY hour",
+                (contract, start_hour, end_hour),
+            )
+            raw = cursor.fetchall()
+        return [(from_epoch_hour(hour), consumption, reading) for hour, consumption, reading in raw]
+
+    def covered_days(self, contract, start: date, end: date, through: datetime | None = None, min_hours: int = 23) -> set:
+        """Return the days of start..end (inclusive) holding at least `min_hours` rows (23: DST spring-forward day).
+
+        With `through` (the contract's high-water mark) its day is covered once the rows up
+        to that hour are stored, and later days have nothing to fetch yet.
+        """
+        start_hour = to_epoch_hour(datetime.combine(start, datetime.min.time()))
+        end_hour = to_epoch_hour(datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        with self._lock:
+            raw = self._connection().execute(
+                "SELECT hour / 24, COUNT(*) FROM hourly WHERE contract = ? AND hour >= ? AND hour < ? GROUP BY hour / 24",
+                (contract, start_hour, end_hour),
+            ).fetchall()
+        counts = {from_epoch_hour(day * 24).date(): count for day, count in raw}
+        covered = {day for day, count in counts.items() if count >= min_hours}
+        if through is not None:
+            mark_day = through.date()
+            if counts.get(mark_day, 0) >= min(through.hour, min_hours): covered.add(mark_day) # One hour of slack, as for DST
+            day = max(start, mark_day + timedelta(days=1))
+            while day <= end: covered.add(day); day += timedelta(days=1)
+        return covered
+
+    def latest(self, contract):
+        """Return the newest (datetime, consumption, reading) row for a contract, or None."""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT hour, consumption, reading FROM hourly WHERE contract = ? ORDER BY hour DESC LIMIT 1",
+                (contract,),
+            ).fetchone()
+        return (from_epoch_hour(row[0]), row[1], row[2]) if row else None
+
+    def compact(self, retain_days=None, now: datetime | None = None) -> int:
+        """Drop rows older than retain_days (if given) and reclaim free pages; returns rows deleted."""
+        deleted = 0
+        with self._lock:
+            conn = self._connection()
+            if retain_days:
+                cutoff = to_epoch_hour((now or datetime.now()) - timedelta(days=retain_days))
+                with conn:
+                    deleted = conn.execute("DELETE FROM hourly WHERE hour < ?", (cutoff,)).rowcount
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA optimize")
+        _LOGGER.debug("Compacted hourly history store (%d rows deleted).", deleted)
+        return deleted
+
+    def remove_contract(self, contract) -> None:
+        """Delete all rows of a contract."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM hourly WHERE contract = ?", (contract,))
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
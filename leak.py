@@ -0,0 +1,108 @@
+"""Streaming continuous-flow and night-leak detection over the hourly consumption rows."""
+import logging
+from datetime import datetime, tzinfo
+
+_LOGGER = logging.getLogger(__name__)
+
+ALARM_CONTINUOUS_FLOW = "continuous_flow" # Water ran every hour for too long
+ALARM_NIGHT_FLOW = "night_flow" # Water ran through every night hour
+ALARMS = (ALARM_CONTINUOUS_FLOW, ALARM_NIGHT_FLOW)
+
+
+class LeakDetector:
+    """Constant-memory leak indicators of one contract, updated once per new hour.
+
+    Keeps the run of consecutive hours with consumption, the minimum flow of the
+    last complete night window and an EWMA baseline of the hourly consumption.
+    Rows must arrive oldest first (older or repeated hours are ignored); a missing
+    hour (more than one real hour since the previous row, so DST changes are not
+    gaps) breaks the run and the night in progress.
+    """
+
+    __slots__ = (
+        "_tz", "_continuous_hours", "_night_start", "_night_end", "_night_min_flow", "_alpha",
+        "newest", "_stamp", "flow_hours", "flow_since", "baseline", "night_min", "_night_hours", "_night_running_min",
+        "active",
+    )
+
+    def __init__(self, tz: tzinfo, continuous_hours: int, night: tuple[int, int], night_min_flow: float, alpha: float) -> None:
+        """Initialize; `night` is the (first, end) local hour of the window, flows are m³ per hour."""
+        self._tz = tz
+        self._continuous_hours = continuous_hours
+        self._night_start, self._night_end = night
+        self._night_min_flow = night_min_flow
+        self._alpha = alpha
+        self.newest: datetime | None = None # Newest hour added
+        self._stamp = None # Its UTC timestamp
+        self.flow_hours = 0 # Consecutive hours with consumption
+        self.flow_since: datetime | None = None # First hour of that run
+        self.baseline: float | None = None # EWMA of the hourly consumption
+        self.night_min: float | None = None # Minimum flow of the last complete night
+        self._night_hours = 0 # Hours seen of the night in progress
+        self._night_running_min = None
+        self.active = dict.fromkeys(ALARMS, False)
+
+    def add(self, hour: datetime, consumption: float | None) -> list:
+        """Add the consumption of the hour starting at `hour`; returns the (alarm, active) changes it caused."""
+        if self.newest is not None and hour <= self.newest: return []
+        stamp = hour.replace(tzinfo=self._tz).timestamp()
+        if consumption is None or (self._stamp is not None and stamp - self._stamp > 3600): # Gap: unknown flow
+            self.flow_hours = 0; self.flow_since = None; self._night_hours = 0
+        self.newest = hour; self._stamp = stamp
+        if consumption is None: return self._update()
+
+        if consumption > 0:
+            if not self.flow_hours: self.flow_since = hour
+            self.flow_hours += 1
+        else: self.flow_hours = 0; self.flow_since = None
+        self.baseline = consumption if self.baseline is None else self.baseline + self._alpha * (consumption - self.baseline)
+
+        # --- Night window: the minimum counts only when every night hour was seen ---
+        if hour.hour == self._night_start: self._night_hours = 1; self._night_running_min = consumption
+        elif self._night_hours and self._night_start < hour.hour < self._night_end:
+            self._night_hours += 1; self._night_running_min = min(self._night_running_min, consumption)
+        else: self._night_hours = 0 # Outside the window, or the night started unseen
+        if self._night_hours == self._night_end - self._night_start: # Last night hour seen
+            self.night_min = self._night_running_min; self._night_hours = 0
+        return self._update()
+
+    def add_rows(self, rows) -> list:
+        """Add (datetime, consumption, reading) rows, oldest first; returns the alarm changes."""
+        changes = []
+        for hour, consumption, *_ in rows: changes += self.add(hour, consumption)
+        return changes
+
+    def _update(self) -> list:
+        state = {
+            ALARM_CONTINUOUS_FLOW: self.flow_hours >= self._continuous_hours,
+            ALARM_NIGHT_FLOW: self.night_min is not None and self.night_min >= self._night_min_flow,
+        }
+        changes = [(alarm, active) for alarm, active in state.items() if self.active[alarm] != active]
+        self.active = state
+        return changes
+
+    def as_dict(self) -> dict:
+        """Return the running state as a JSON-serializable dict (for HA storage)."""
+        return {
+            "newest": self.newest.isoformat() if self.newest else None,
+            "flow_hours": self.flow_hours, "flow_since": self.flow_since.isoformat() if self.flow_since else None,
+            "baseline": self.baseline, "night_min": self.night_min,
+            "night_hours": self._night_hours, "night_running_min": self._night_running_min,
+        }
+
+    def restore(self, stored: dict | None) -> bool:
+        """Restore a state saved by as_dict; returns False (state unchanged) if invalid."""
+        if not stored: return False
+        try:
+            newest = datetime.fromisoformat(stored["newest"]) if stored.get("newest") else None
+            flow_since = datetime.fromisoformat(stored["flow_since"]) if stored.get("flow_since") else None
+            values = (int(stored.get("flow_hours", 0)), int(stored.get("night_hours", 0)))
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored leak detector state: %s", err)
+            return False
+        self.newest = newest; self._stamp = newest.replace(tzinfo=self._tz).timestamp() if newest else None
+        self.flow_hours, self._night_hours = values; self.flow_since = flow_since
+        self.baseline = stored.get("baseline"); self.night_min = stored.get("night_min")
+        self._night_running_min = stored.get("night_running_min")
+        self._update()
+        return True
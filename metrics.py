@@ -0,0 +1,111 @@
+"""Per-phase timings and request counters of the portal client, with rolling percentiles."""
+import contextlib
+import contextvars
+import time
+from collections import Counter, deque
+
+_SAMPLES = 100 # Rolling window of durations kept per phase
+
+# Phases timed by the API client
+PHASE_POLL = "poll" # Whole async_get_consumption_data call
+PHASE_LOGIN = "login" # Whole async_login call
+PHASE_LOGIN_PAGE = "login_page"
+PHASE_LOGIN_POST = "login_post"
+PHASE_CONSUMPTION_PAGE = "consumption_page" # GET of the page carrying the p_auth
+PHASE_P_AUTH_PARSE = "p_auth_parse" # p_auth extraction (fast scan, BeautifulSoup fallback)
+PHASE_HOURLY_API = "hourly_api" # JSON API call, body digest and decode
+PHASE_PROCESS_ROWS = "process_rows"
+PHASE_CONTRACTS = "contracts" # Contracts page GET and parse
+
+# Counters
+COUNTER_REQUESTS = "requests"
+COUNTER_BYTES = "bytes"
+COUNTER_ROWS = "rows" # consumos entries received
+COUNTER_NEW_ROWS = "new_rows" # Rows newer than the high-water mark
+COUNTER_RETRIES = "retries" # Requests repeated after a transient error or rejected token
+COUNTER_RELOGINS = "relogins" # Logins after the session expired
+
+
+def percentile(samples, q: float):
+    """Return the nearest-rank `q` quantile (0..1) of the samples, or None when empty."""
+    if not samples: return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PhaseStats:
+    """Call count, failures and the rolling durations of one phase."""
+
+    __slots__ = ("count", "errors", "last", "max", "samples")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.last = None
+        self.max = 0.0
+        self.samples = deque(maxlen=_SAMPLES)
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count, "errors": self.errors,
+            "last": self.last, "max": self.max,
+            "p50": percentile(self.samples, 0.50), "p95": percentile(self.samples, 0.95),
+        }
+
+
+class PollMetrics:
+    """Timing and counters of one API client.
+
+    `phase()` times a block (cancellation is not an error); `add()` bumps a counter,
+    both in the running totals and in the poll in progress, whose counters become
+    `last_poll` when it ends. The poll in progress is tracked per task context, so
+    requests of a concurrent range fetch (backfill, fetch_history) only count in the
+    totals.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty metrics."""
+        self._phases: dict[str, PhaseStats] = {}
+        self.totals = Counter()
+        self.last_poll: dict = {}
+        self._current = contextvars.ContextVar(f"poll_counters_{id(self)}", default=None) # Inherited by the poll's tasks
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Time the block as one call of `name`."""
+        started = time.perf_counter(); failed = False
+        try: yield
+        except Exception: failed = True; raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = self._phases.get(name) or self._phases.setdefault(name, PhaseStats())
+            stats.count += 1; stats.errors += failed
+            stats.last = elapsed; stats.max = max(stats.max, elapsed); stats.samples.append(elapsed)
+
+    @contextlib.contextmanager
+    def poll(self):
+        """Time a whole poll and collect the counters it adds."""
+        token = self._current.set(Counter())
+        try:
+            with self.phase(PHASE_POLL): yield
+        finally:
+            self.last_poll = dict(self._current.get()); self._current.reset(token)
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        """Add to a counter."""
+        self.totals[counter] += amount
+        current = self._current.get()
+        if current is not None: current[counter] += amount
+
+    def phase_stats(self, name: str) -> dict | None:
+        """Return the figures of one phase, or None if it never ran."""
+        stats = self._phases.get(name)
+        return stats.as_dict() if stats else None
+
+    def as_dict(self) -> dict:
+        """Return all figures (seconds and counts) as a JSON-serializable dict."""
+        return {
+            "phases": {name: stats.as_dict() for name, stats in self._phases.items()},
+            "totals": dict(self.totals),
+            "last_poll": dict(self.last_poll),
+        }
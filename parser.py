@@ -0,0 +1,105 @@
+"""HTML extraction helpers for the Aigües de l'Horta portal pages.
+
+The fast path runs precompiled patterns over the raw page text in a single pass;
+the BeautifulSoup full-tree walks are kept as fallbacks for unexpected markup.
+"""
+import html
+import logging
+import re
+
+_LOGGER = logging.getLogger(__name__)
+
+# --- Precompiled patterns (fast path) ---
+_P_AUTH_RE = re.compile(r'p_auth=([a-zA-Z0-9]+)[&\s\'"]') # Scripts, form actions and links
+_P_AUTH_INPUT_RE = re.compile(r'<input\b([^>]*\bname\s*=\s*["\']p_auth["\'][^>]*)>', re.I)
+_ACTION_P_AUTH_RE = re.compile(r'[?&]p_auth=([^&]+)')
+_LOGIN_FORM_RE = re.compile(r'<form\b([^>]*\bid\s*=\s*["\']loginForm["\'][^>]*)>(.*?)</form\s*>', re.I | re.S)
+_INPUT_RE = re.compile(r'<input\b([^>]*)>', re.I)
+_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+))')
+_PORTLET_ID_RE = re.compile(r'p_p_id_MisConsumos', re.I)
+_CONTRACTS_BLOCK_RE = re.compile(r'<(?:section|div)\b[^>]*\bid\s*=\s*["\'][^"\']*contrat', re.I) # Contracts portlet
+_BODY_RE = re.compile(r'<body\b', re.I)
+_NOISE_RE = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->', re.I | re.S)
+_SESSION_TOKEN_RE = re.compile(r'p_auth=[a-zA-Z0-9]+')
+
+
+def _tag_attrs(raw_attrs):
+    """Return the attributes of a start tag as a dict (names lower-cased, entities decoded)."""
+    return {
+        m.group(1).lower(): html.unescape(m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4))
+        for m in _ATTR_RE.finditer(raw_attrs)
+    }
+
+
+def find_p_auth(page_html):
+    """Return the p_auth token found in raw page HTML, or None (fast path)."""
+    match = _P_AUTH_RE.search(page_html)
+    if match: return match.group(1)
+    for input_match in _P_AUTH_INPUT_RE.finditer(page_html):
+        attrs = _tag_attrs(input_match.group(1))
+        if attrs.get('type', '').lower() == 'hidden' and attrs.get('value'): return attrs['value']
+    return None
+
+
+def extract_login_form(page_html):
+    """Return (action, hidden_fields) of the loginForm from raw page HTML, or None (fast path)."""
+    match = _LOGIN_FORM_RE.search(page_html)
+    if not match: return None
+    action = _tag_attrs(match.group(1)).get('action')
+    hidden_fields = {}
+    for input_match in _INPUT_RE.finditer(match.group(2)):
+        attrs = _tag_attrs(input_match.group(1))
+        if attrs.get('type') == 'hidden' and attrs.get('name'): hidden_fields[attrs['name']] = attrs.get('value', '')
+    return action, hidden_fields
+
+
+def login_p_auth(action, hidden_fields):
+    """Return the p_auth token of the login form (action query string first, then hidden input)."""
+    match = _ACTION_P_AUTH_RE.search(action or '')
+    if match: return match.group(1)
+    return hidden_fields.get('p_auth') or None
+
+
+def contracts_fragment(page_html):
+    """Return the part of the contracts page that can hold contracts (fast path).
+
+    Starts at the contracts portlet (else at <body>) and drops scripts, styles,
+    comments and p_auth tokens, so it only changes when the contracts do.
+    """
+    match = _CONTRACTS_BLOCK_RE.search(page_html) or _BODY_RE.search(page_html)
+    fragment = page_html[match.start():] if match else page_html
+    return _SESSION_TOKEN_RE.sub('', _NOISE_RE.sub('', fragment))
+
+
+# --- Full-tree fallbacks (BeautifulSoup) ---
+def extract_login_form_soup(soup):
+    """Return (action, hidden_fields) of the loginForm from a BeautifulSoup tree, or None."""
+    login_form = soup.find('form', {'id': 'loginForm'})
+    if not login_form: return None
+    hidden_fields = { inp.get('name'): inp.get('value', '') for inp in login_form.find_all('input', type='hidden') if inp.get('name') }
+    return login_form.get('action'), hidden_fields
+
+
+def find_p_auth_soup(soup):
+    """Helper to find p_auth token within a BeautifulSoup object, prioritizing scripts."""
+    _LOGGER.debug("Searching for fresh p_auth token in page content...")
+    scripts = soup.find_all('script')
+    for script in scripts: # 1. Check scripts
+        if script.string:
+            match = _P_AUTH_RE.search(script.string)
+            if match: token = match.group(1); _LOGGER.info("Found p_auth in SCRIPT: %s", token); return token
+    portlet_div = soup.find(id=_PORTLET_ID_RE) or soup
+    forms = portlet_div.find_all('form') # 2. Check forms
+    for form in forms:
+        action = form.get('action', ''); match = _ACTION_P_AUTH_RE.search(action)
+        if match: token = match.group(1); _LOGGER.info("Found p_auth in form action: %s", token); return token
+        hidden = form.find('input', {'name': 'p_auth', 'type': 'hidden'})
+        if hidden and hidden.get('value'): token = hidden['value']; _LOGGER.info("Found p_auth in form hidden: %s", token); return token
+    links = portlet_div.find_all('a', href=True) # 3. Check links
+    for link in links:
+        match = _ACTION_P_AUTH_RE.search(link['href'])
+        if match: token = match.group(1); _LOGGER.info("Found p_auth in link: %s", token); return token
+    hidden = soup.find('input', {'name': 'p_auth', 'type': 'hidden'}) # 4. Check global hidden
+    if hidden and hidden.get('value'): token = hidden['value']; _LOGGER.info("Found p_auth in global hidden: %s", token); return token
+    _LOGGER.warning("Could not find a fresh p_auth token in page content.")
+    return None
@@ -0,0 +1,105 @@
+"""Adaptive polling: learn when the portal publishes new hours and poll around that time."""
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+
+_LOGGER = logging.getLogger(__name__)
+
+_SAMPLES = 48 # Arrivals kept to estimate the publication cadence
+_MIN_GAP = timedelta(hours=1)
+_MAX_GAP = timedelta(days=1)
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else None
+
+
+class PublicationModel:
+    """Estimate when new hourly data appears on the portal from past arrivals.
+
+    An arrival is a poll that found hours newer than any seen before; the data was
+    published between the previous poll and that one, so the arrival is recorded a
+    quarter of that span back (at most a quarter `min_interval`, which also makes
+    clean hits probe slightly earlier each time). The next publication is expected
+    one median gap after the last arrival: the first poll goes there, misses are
+    retried every `min_interval` for `window`, and later polls back off in
+    proportion to how overdue the data is.
+    """
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta, window: timedelta) -> None:
+        """Initialize the model (nothing learnt yet)."""
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.newest: datetime | None = None # Newest data hour seen
+        self._arrivals = deque(maxlen=_SAMPLES) # Wall-clock times new hours were first seen
+        self._lags = deque(maxlen=_SAMPLES) # Seconds from the end of the newest hour to its arrival
+        self.last_poll: datetime | None = None
+        self.polls = 0
+        self.useful_polls = 0
+
+    def observe(self, now: datetime, newest: datetime | None) -> bool:
+        """Record a successful poll at `now` whose newest hour is `newest`; returns True if it brought new data."""
+        self.polls += 1
+        previous_poll, self.last_poll = self.last_poll, now
+        if newest is None or (self.newest is not None and newest <= self.newest): return False
+        if self.newest is not None and previous_poll is not None: # The very first poll only tells what already existed
+            arrival = now - min(now - previous_poll, self.min_interval) / 4
+            self._arrivals.append(arrival)
+            self._lags.append((arrival - newest - timedelta(hours=1)).total_seconds())
+            self.useful_polls += 1
+        self.newest = newest
+        return True
+
+    def gap(self) -> timedelta | None:
+        """Return the typical time between arrivals, or None until two arrivals were seen."""
+        arrivals = list(self._arrivals)
+        gap = _median([b - a for a, b in zip(arrivals, arrivals[1:])])
+        if gap is None: return None
+        return min(max(gap, _MIN_GAP), _MAX_GAP)
+
+    def expected(self) -> datetime | None:
+        """Return when the next arrival is expected, or None while the cadence is unknown."""
+        gap = self.gap()
+        if gap is None: return None
+        return self._arrivals[-1] + gap
+
+    def next_delay(self, now: datetime) -> timedelta | None:
+        """Return the wait until the next poll, or None while the cadence is unknown."""
+        expected = self.expected()
+        if expected is None: return None
+        if now < expected: # Wait for it (long cadences may sleep up to half a gap)
+            return max(min(expected - now, max(self.max_interval, self.gap() / 2)), timedelta(seconds=1))
+        if now < expected + self.window: return self.min_interval # Publication window: poll hard
+        overdue = now - expected - self.window # Late: back off as the delay grows
+        return min(max(overdue, self.min_interval), self.max_interval)
+
+    def stats(self) -> dict:
+        """Return the learnt cadence and the share of polls that brought new data."""
+        gap = self.gap(); expected = self.expected(); lag = _median(self._lags)
+        return {
+            "publication_gap": gap.total_seconds() if gap else None,
+            "publication_lag": lag,
+            "next_expected": expected.isoformat() if expected else None,
+            "polls": self.polls,
+            "useful_polls": self.useful_polls,
+        }
+
+    def as_dict(self) -> dict:
+        """Return the learnt state as a JSON-serializable dict (for HA storage)."""
+        return {
+            "newest": self.newest.isoformat() if self.newest else None,
+            "arrivals": [arrival.isoformat() for arrival in self._arrivals],
+            "lags": list(self._lags),
+        }
+
+    def restore(self, stored: dict | None) -> None:
+        """Restore the state saved by as_dict."""
+        if not stored: return
+        try:
+            self.newest = datetime.fromisoformat(stored["newest"]) if stored.get("newest") else None
+            self._arrivals.extend(datetime.fromisoformat(value) for value in stored.get("arrivals", []))
+            self._lags.extend(float(value) for value in stored.get("lags", []))
+        except (TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored polling state: %s", err)
@@ -0,0 +1,221 @@
+"""Integration-wide request scheduling shared by all Aigües de l'Horta entries.
+
+RequestGate caps concurrent portal requests and their rate (token bucket);
+CircuitBreaker stops requests while the portal is down; RefreshScheduler
+spreads the entries' refreshes evenly across the poll interval.
+"""
+import asyncio
+import contextlib
+import logging
+import random
+import time
+from collections import deque
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+_LOGGER = logging.getLogger(__name__)
+
+_WAIT_SAMPLES = 100 # Rolling window of wait times kept per key
+
+
+class RequestGate:
+    """Global concurrency cap and request-rate limit for portal requests."""
+
+    def __init__(self, max_concurrency: int, rate: float, burst: int) -> None:
+        """Initialize the gate (`rate` requests per second, up to `burst` back to back)."""
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket_lock = asyncio.Lock()
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self.queue_depth = 0
+        self.active = 0
+        self.total_requests = 0
+        self._waits = {} # key -> deque of wait seconds
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: str = ""):
+        """Wait for a free slot and a rate token, then run the request inside the block."""
+        enqueued = time.monotonic()
+        self.queue_depth += 1
+        try:
+            await self._semaphore.acquire()
+            try: await self._async_take_token()
+            except BaseException: self._semaphore.release(); raise
+        finally:
+            self.queue_depth -= 1
+        wait = time.monotonic() - enqueued
+        self._waits.setdefault(key, deque(maxlen=_WAIT_SAMPLES)).append(wait)
+        if wait > 1: _LOGGER.debug("Portal request for %s waited %.1f s in the queue.", key, wait)
+        self.active += 1; self.total_requests += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    async def _async_take_token(self) -> None:
+        async with self._bucket_lock: # Waiters take tokens in arrival order
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._refilled) * self._rate)
+                self._refilled = now
+                if self._tokens >= 1: self._tokens -= 1; return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def stats(self, key: str | None = None) -> dict:
+        """Return queue depth and wait times (seconds), globally or for one key."""
+        if key is None: waits = [w for samples in self._waits.values() for w in samples]
+        else: waits = list(self._waits.get(key, ()))
+        return {
+            "queue_depth": self.queue_depth,
+            "active_requests": self.active,
+            "total_requests": self.total_requests,
+            "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+            "max_wait": max(waits) if waits else 0.0,
+            "last_wait": waits[-1] if waits else 0.0,
+        }
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Return a randomized wait before retry `attempt` (0-based): full jitter over an exponential ceiling."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Stop hitting the portal after repeated transient failures.
+
+    After `failure_threshold` consecutive failures the circuit opens for
+    `reset_timeout`; then a single probe request is let through (half-open). Its
+    success closes the circuit, its failure reopens it for twice as long (up to
+    `max_reset_timeout`).
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: timedelta, max_reset_timeout: timedelta) -> None:
+        """Initialize a closed circuit."""
+        self._threshold = failure_threshold
+        self._base_timeout = reset_timeout.total_seconds()
+        self._max_timeout = max_reset_timeout.total_seconds()
+        self._timeout = self._base_timeout
+        self.failures = 0 # Consecutive failures
+        self._opened_at: float | None = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        """Return "closed", "open" or "half_open"."""
+        if self._opened_at is None: return "closed"
+        return "half_open" if self._probing or time.monotonic() - self._opened_at >= self._timeout else "open"
+
+    def retry_in(self) -> float:
+        """Return the seconds until a probe is allowed (0 when requests may be sent)."""
+        if self._opened_at is None: return 0.0
+        return max(0.0, self._opened_at + self._timeout - time.monotonic())
+
+    def before_request(self) -> bool:
+        """Allow a request or raise CircuitOpenError; in half-open state only one probe passes.
+
+        Returns True if the request is the probe: it must end in record_success(),
+        record_failure() or, when it got no answer (e.g. cancelled), release_probe().
+        """
+        if self._opened_at is None: return False
+        if self._probing or self.retry_in() > 0: raise CircuitOpenError(f"Portal circuit open (retry in {self.retry_in():.0f} s)")
+        self._probing = True
+        _LOGGER.debug("Circuit half-open: sending a probe request.")
+        return True
+
+    def release_probe(self) -> None:
+        """Let another probe through after one that ended without an outcome."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Record a request that reached the portal; closes the circuit."""
+        if self._opened_at is not None: _LOGGER.info("Portal reachable again; resuming requests.")
+        self.failures = 0; self._opened_at = None; self._probing = False; self._timeout = self._base_timeout
+
+    def record_failure(self) -> None:
+        """Record a transient failure; opens (or reopens) the circuit when due."""
+        self.failures += 1
+        if self._probing: # Failed probe: wait longer before the next one
+            self._probing = False; self._timeout = min(self._timeout * 2, self._max_timeout)
+            self._opened_at = time.monotonic()
+            _LOGGER.warning("Portal probe failed; next attempt in %.0f s.", self._timeout)
+        elif self._opened_at is None and self.failures >= self._threshold:
+            self._opened_at = time.monotonic(); self.trips += 1
+            _LOGGER.warning("Portal failed %d times in a row; pausing requests for %.0f s.", self.failures, self._timeout)
+
+    def stats(self) -> dict:
+        """Return the circuit state and counters."""
+        return {"state": self.state, "consecutive_failures": self.failures, "trips": self.trips, "retry_in": round(self.retry_in(), 1)}
+
+
+class RefreshScheduler:
+    """Run each registered coordinator's refresh in its own phase of the poll interval.
+
+    Coordinators that have learnt the portal's publication cadence
+    (`next_refresh_delay()` not None) are refreshed on that schedule instead.
+    """
+
+    def __init__(self, hass: HomeAssistant, jitter: timedelta) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._jitter = jitter.total_seconds()
+        self._entries = {} # key -> coordinator (insertion order defines the phase)
+        self._handles = {}
+
+    @callback
+    def async_register(self, key: str, coordinator):
+        """Start scheduling a coordinator's refreshes; returns the unregister callback."""
+        self._entries[key] = coordinator
+        self._async_schedule(key)
+
+        @callback
+        def _async_unregister() -> None:
+            self._entries.pop(key, None)
+            if handle := self._handles.pop(key, None): handle()
+
+        return _async_unregister
+
+    def _phase(self, key: str, interval: float) -> float:
+        """Return the entry's offset within the interval (entries evenly spaced)."""
+        keys = list(self._entries)
+        return interval * keys.index(key) / len(keys)
+
+    @callback
+    def _async_schedule(self, key: str) -> None:
+        coordinator = self._entries.get(key)
+        if coordinator is None: return
+        adaptive = coordinator.next_refresh_delay()
+        if adaptive is not None: # Learnt publication cadence; the jitter keeps entries apart
+            delay = adaptive.total_seconds() + random.uniform(0, self._jitter)
+        else:
+            interval = coordinator.poll_interval.total_seconds()
+            now = time.time()
+            next_run = now - now % interval + self._phase(key, interval)
+            while next_run <= now + interval / 2: next_run += interval # Keep roughly one interval since the last run
+            delay = next_run - now + random.uniform(0, self._jitter)
+        if handle := self._handles.pop(key, None): handle()
+
+        @callback
+        def _async_fire(_now) -> None:
+            self._handles.pop(key, None)
+            self.hass.async_create_task(self._async_run(key))
+
+        self._handles[key] = async_call_later(self.hass, delay, _async_fire)
+        _LOGGER.debug("Next refresh of %s in %.0f s.", key, delay)
+
+    async def _async_run(self, key: str) -> None:
+        coordinator = self._entries.get(key)
+        if coordinator is None: return
+        try:
+            await coordinator.async_refresh()
+        finally:
+            self._async_schedule(key)
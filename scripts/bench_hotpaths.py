@@ -0,0 +1,197 @@
+"""Benchmarks of the per-poll hot paths: page parsing, consumos processing, contracts, sensor attributes.
+
+Usage:
+    python scripts/bench_hotpaths.py [--fixtures DIR] [--save NAME] [--compare NAME] [--threshold PCT]
+
+Runs offline on synthetic, anonymized pages from sample_pages.py, or on recorded
+fixtures in DIR (login.html, mis_consumos.html, consumos.json, contratos.html; any
+missing file falls back to the synthetic one). Results are saved as JSON under
+.benchmarks/ (local, not versioned) so a later run can be compared against an earlier
+version; cases slower than the threshold are reported as regressions (exit status 1).
+A NAME not found there is looked up in scripts/benchmarks/, where the reference run of
+the released code is committed (`--compare reference`); timings from another machine
+are only comparable in magnitude, so compare against a local run before trusting a
+small regression.
+Requires Home Assistant and beautifulsoup4 (the integration modules are imported).
+"""
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import timezone
+from types import SimpleNamespace
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_ROOT = os.path.normpath(os.path.join(_HERE, os.pardir))
+_RESULTS_DIR = os.path.join(_ROOT, ".benchmarks") # Local runs (--save)
+_REFERENCE_DIR = os.path.join(_HERE, "benchmarks") # Committed reference runs
+sys.path.insert(0, _HERE)
+import sample_pages  # noqa: E402
+
+ROW_COUNTS = (24, 168, 1000, 10000)
+
+
+def load_package():
+    """Import the integration as package `aigues_horta` from the repository root (needs Home Assistant)."""
+    if "aigues_horta" in sys.modules: return sys.modules["aigues_horta"]
+    spec = importlib.util.spec_from_file_location("aigues_horta", os.path.join(_ROOT, "__init__.py"), submodule_search_locations=[_ROOT])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["aigues_horta"] = package
+    spec.loader.exec_module(package)
+    return package
+
+
+def _load_integration():
+    load_package()
+    return importlib.import_module("aigues_horta.aigues_horta_api"), importlib.import_module("aigues_horta.sensor")
+
+
+def _fixtures(directory):
+    """Return the benchmark inputs: recorded files from `directory` when present, else synthetic pages."""
+    def _read(name, default):
+        path = os.path.join(directory, name) if directory else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as handle: return handle.read()
+        return default()
+    consumos = json.loads(_read("consumos.json", lambda: json.dumps({"consumos": sample_pages.consumos_rows(max(ROW_COUNTS))})))
+    rows = consumos.get("consumos", [])
+    while rows and len(rows) < max(ROW_COUNTS): rows = rows + rows # Recorded payloads are usually short
+    return {
+        "login": _read("login.html", sample_pages.login_page),
+        "mis_consumos": _read("mis_consumos.html", sample_pages.consumos_page),
+        "contratos": _read("contratos.html", lambda: sample_pages.contratos_page(contracts=5)),
+        "consumos": rows,
+    }
+
+
+def _time(func):
+    """Return the best per-call time (seconds) over 5 repeats."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def _build_cases(api_module, sensor_module, fixtures):
+    """Return the (name, callable) benchmark cases and the event loop they use."""
+    from bs4 import BeautifulSoup
+    parser = importlib.import_module("aigues_horta.parser")
+    series_module = importlib.import_module("aigues_horta.series")
+    api = api_module.AiguesHortaAsyncAPI("bench", "bench")
+    cases = []
+
+    # --- Login page: form + p_auth (fast path and BeautifulSoup fallback) ---
+    login_html = fixtures["login"]
+    cases.append(("login_form_fast", lambda: parser.login_p_auth(*parser.extract_login_form(login_html))))
+    cases.append(("login_form_soup", lambda: parser.login_p_auth(*parser.extract_login_form_soup(BeautifulSoup(login_html, "html.parser")))))
+
+    # --- Consumption page: fresh p_auth ---
+    consumos_html = fixtures["mis_consumos"]
+    cases.append(("find_p_auth_fast", lambda: parser.find_p_auth(consumos_html)))
+    cases.append(("find_fresh_p_auth_soup", lambda: api._find_fresh_p_auth(BeautifulSoup(consumos_html, "html.parser"))))
+
+    # --- consumos processing (fresh series each call: every row is new) ---
+    for count in ROW_COUNTS:
+        payload = {"consumos": fixtures["consumos"][:count]}
+        cases.append((f"process_consumos_{count}", lambda payload=payload, days=count // 24 + 1: api._process_consumos(payload, api_module.ContractSeries(), days_back=days)))
+
+    # --- Unchanged API body: digest only vs JSON decode ---
+    body = json.dumps({"consumos": fixtures["consumos"][:1000]})
+    cases.append(("fingerprint_body_1000", lambda: hashlib.blake2b(body.encode(), digest_size=16).hexdigest()))
+    cases.append(("json_loads_body_1000", lambda: json.loads(body)))
+
+    # --- Streaming aggregates: 1000 new hours into fresh period totals / leak detector ---
+    aggregates = importlib.import_module("aigues_horta.aggregates")
+    leak = importlib.import_module("aigues_horta.leak")
+    new_rows = api._process_consumos({"consumos": fixtures["consumos"][:1000]}, api_module.ContractSeries(), days_back=1000 // 24 + 1)
+    new_rows.sort(key=lambda row: row[0])
+    cases.append(("period_totals_add_1000", lambda: aggregates.PeriodTotals(timezone.utc).add_rows(new_rows)))
+    cases.append(("leak_detector_add_1000", lambda: leak.LeakDetector(timezone.utc, 24, (2, 5), 0.001, 0.05).add_rows(new_rows)))
+
+    # --- Contracts page (request replaced by the recorded page) ---
+    contratos_html = fixtures["contratos"]
+    async def _fake_request(method, url, **kwargs): return 200, url, contratos_html
+    contracts_api = api_module.AiguesHortaAsyncAPI("bench", "bench")
+    contracts_api._async_request = _fake_request
+    loop = asyncio.new_event_loop()
+    def _get_contracts():
+        contracts_api._contracts = None
+        return loop.run_until_complete(contracts_api.async_get_contracts())
+    cases.append(("get_contracts", _get_contracts))
+    def _get_contracts_unchanged(): # Cache expired, same page: hashed, not parsed
+        contracts_api._contracts_checked = 0.0
+        return loop.run_until_complete(contracts_api.async_get_contracts())
+    cases.append(("get_contracts_unchanged", _get_contracts_unchanged))
+    container = BeautifulSoup(contratos_html, "html.parser").select_one('div[class*="contract"]')
+    if container is not None: cases.append(("extract_contract_details", lambda: api._extract_contract_details(container)))
+
+    # --- Sensor attributes ---
+    entry = SimpleNamespace(entry_id="bench", title="bench", options={})
+    for count in ROW_COUNTS:
+        series = api_module.ContractSeries()
+        api._process_consumos({"consumos": fixtures["consumos"][:count]}, series, days_back=count // 24 + 1)
+        data = {"current_consumption": series.latest_reading, "last_reading_date": None, "hourly_consumption": series_module.HourlySeries.from_mapping(series.hourly_consumption),
+                "contract_number": "1", "address": None}
+        coordinator = SimpleNamespace(data={**data, "primary": "1", "contracts": {"1": data}}, last_update_success=True)
+        hourly_sensor = sensor_module.AiguesHortaHourlyConsumptionSensor(coordinator, entry)
+        cases.append((f"hourly_sensor_update_attrs_{count}", hourly_sensor._update_attrs))
+        if count == ROW_COUNTS[0]:
+            reading_sensor = sensor_module.AiguesHortaMeterReadingSensor(coordinator, entry)
+            cases.append(("reading_sensor_update_attrs", reading_sensor._update_attrs))
+    return cases, loop
+
+
+def _git_revision():
+    try: return subprocess.run(["git", "-C", _ROOT, "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError): return None
+
+
+def main(argv):
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--fixtures", help="directory with recorded, anonymized pages")
+    args.add_argument("--save", metavar="NAME", help="store the results as .benchmarks/NAME.json")
+    args.add_argument("--compare", metavar="NAME", help="compare against .benchmarks/NAME.json (else scripts/benchmarks/NAME.json)")
+    args.add_argument("--threshold", type=float, default=20.0, help="regression threshold in percent (default 20)")
+    args.add_argument("-k", dest="select", help="only run cases whose name contains this text")
+    opts = args.parse_args(argv[1:])
+
+    api_module, sensor_module = _load_integration()
+    cases, loop = _build_cases(api_module, sensor_module, _fixtures(opts.fixtures))
+    baseline = None
+    if opts.compare:
+        path = os.path.join(_RESULTS_DIR, f"{opts.compare}.json")
+        if not os.path.exists(path): path = os.path.join(_REFERENCE_DIR, f"{opts.compare}.json")
+        with open(path, encoding="utf-8") as handle: baseline = json.load(handle)["results"]
+
+    results = {}; regressions = []
+    print(f"{'case':<34} {'us/call':>12} {'baseline':>12} {'change':>8}")
+    for name, func in cases:
+        if opts.select and opts.select not in name: continue
+        seconds = _time(func); results[name] = seconds
+        line = f"{name:<34} {seconds * 1e6:>12.1f}"
+        if baseline and name in baseline:
+            change = (seconds / baseline[name] - 1) * 100
+            line += f" {baseline[name] * 1e6:>12.1f} {change:>+7.1f}%"
+            if change > opts.threshold: regressions.append(name); line += "  REGRESSION"
+        print(line)
+    loop.close()
+
+    if opts.save:
+        os.makedirs(_RESULTS_DIR, exist_ok=True)
+        with open(os.path.join(_RESULTS_DIR, f"{opts.save}.json"), "w", encoding="utf-8") as handle:
+            json.dump({"revision": _git_revision(), "python": platform.python_version(), "machine": platform.machine(),
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, handle, indent=2, sort_keys=True)
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {opts.threshold:.0f}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,59 @@
+"""Micro-benchmark: fast p_auth/login-form extraction vs. the BeautifulSoup full-tree walk.
+
+Usage: python scripts/bench_parsing.py [login_page.html] [mis_consumos_page.html]
+Without arguments synthetic pages from sample_pages.py are used. Requires beautifulsoup4.
+"""
+import importlib.util
+import os
+import sys
+import timeit
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _HERE)
+import sample_pages  # noqa: E402
+
+
+def _load_parser():
+    """Load parser.py without importing the integration package (needs Home Assistant)."""
+    spec = importlib.util.spec_from_file_location("aigues_horta_parser", os.path.join(_HERE, os.pardir, "parser.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _measure(func, page, number):
+    seconds = min(timeit.repeat(lambda: func(page), number=number, repeat=5)) / number
+    tracemalloc.start()
+    func(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main(argv):
+    parser = _load_parser()
+    login_html = open(argv[1], encoding="utf-8").read() if len(argv) > 1 else sample_pages.login_page()
+    consumos_html = open(argv[2], encoding="utf-8").read() if len(argv) > 2 else sample_pages.consumos_page()
+
+    cases = [
+        ("login form", login_html,
+         parser.extract_login_form,
+         lambda page: parser.extract_login_form_soup(BeautifulSoup(page, "html.parser"))),
+        ("consumos p_auth", consumos_html,
+         parser.find_p_auth,
+         lambda page: parser.find_p_auth_soup(BeautifulSoup(page, "html.parser"))),
+    ]
+    print(f"{'case':<16} {'size':>8} {'fast ms':>9} {'full ms':>9} {'speedup':>8} {'fast KiB':>9} {'full KiB':>9}")
+    for name, page, fast, full in cases:
+        if fast(page) != full(page): print(f"warning: {name}: fast and full results differ")
+        fast_s, fast_mem = _measure(fast, page, 200)
+        full_s, full_mem = _measure(full, page, 5)
+        print(f"{name:<16} {len(page):>8} {fast_s * 1e3:>9.3f} {full_s * 1e3:>9.2f} {full_s / fast_s:>7.0f}x "
+              f"{fast_mem / 1024:>9.1f} {full_mem / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,219 @@
+"""Local stand-in for the Aigües de l'Horta (Liferay) portal, for offline end-to-end and load testing.
+
+Usage:
+    python scripts/fake_portal.py [--port 8765] [--password secret] [--latency 0.2] [--error-rate 0.01]
+                                  [--session-ttl 1800] [--token-ttl 600] [--contracts 1] [--history-days 400]
+
+Serves the endpoints the client uses: /login (loginForm + p_auth, POST login),
+the mis-consumos page (p_auth), its buscarConsumosHoraria JSON (paged with
+inicio/fin) and the contratos page. Any username is accepted with the configured
+password; every account gets its own deterministic contracts and hourly data.
+Point the client at it with base_url="http://localhost:8765" (or the integration's
+advanced "portal address" field). GET /_stats returns request counters as JSON.
+Requires aiohttp.
+"""
+import argparse
+import asyncio
+import os
+import random
+import secrets
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import sample_pages  # noqa: E402
+
+LOGIN_PATH = "/login"
+CONSUMOS_PATH = "/es/group/aigues-de-l-horta/mis-consumos"
+CONTRACTS_PATH = "/es/group/aigues-de-l-horta/contratos"
+SESSION_COOKIE = "JSESSIONID"
+_CONSUMPTIONS = (0, 0, 0, 0.001, 0.002, 0.005, 0.012, 0.03) # m³ per hour
+
+
+class FakePortal:
+    """In-memory portal state: sessions, tokens and generated consumption data."""
+
+    def __init__(self, opts):
+        """Initialize the portal from the parsed command line options."""
+        self.opts = opts
+        self.sessions = {} # session id -> {"user", "login_p_auth", "page_p_auth", "logged_in", "token_issued"}
+        self.stats = Counter()
+        self.started = time.monotonic()
+
+    # --- Sessions ---
+    def _session(self, request, response_cookies):
+        sid = request.cookies.get(SESSION_COOKIE)
+        session = self.sessions.get(sid)
+        if session is None:
+            sid = secrets.token_hex(16)
+            session = self.sessions[sid] = {"user": None, "login_p_auth": secrets.token_hex(4), "page_p_auth": None, "logged_in": 0.0, "token_issued": 0.0}
+            response_cookies[SESSION_COOKIE] = sid
+        return session
+
+    def _authenticated(self, session):
+        if not session["user"]: return False
+        if self.opts.session_ttl and time.monotonic() - session["logged_in"] > self.opts.session_ttl:
+            session["user"] = None; self.stats["sessions_expired"] += 1
+            return False
+        return True
+
+    def _page_token(self, session):
+        """Return the session's page p_auth, rotating it after token_ttl."""
+        now = time.monotonic()
+        if session["page_p_auth"] is None or (self.opts.token_ttl and now - session["token_issued"] > self.opts.token_ttl):
+            session["page_p_auth"] = secrets.token_hex(4); session["token_issued"] = now
+        return session["page_p_auth"]
+
+    # --- Account data ---
+    def _contracts(self, user):
+        first = 10000000 + zlib.crc32(user.encode()) % 80000000
+        return [str(first + i * 7919) for i in range(self.opts.contracts)]
+
+    def _rows(self, contract, start: date, end: date):
+        """Return the hourly consumos rows of a contract between two dates (inclusive), up to now."""
+        now = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=self.opts.delay_hours)
+        first_day = date.today() - timedelta(days=self.opts.history_days)
+        seed = zlib.crc32(contract.encode())
+        base = 100 + seed % 5000
+        rows = []
+        day = max(start, first_day)
+        while day <= end:
+            for hour in range(24):
+                ts = datetime(day.year, day.month, day.day, hour)
+                if ts > now: break
+                index = int(ts.timestamp()) // 3600
+                consumption = _CONSUMPTIONS[(index * 2654435761 ^ seed) % len(_CONSUMPTIONS)]
+                # Reading grows 0.03 m³/h minus what was not consumed: monotonic and deterministic
+                reading = base + 0.03 * (index - 400000) - (0.03 - consumption)
+                rows.append({
+                    "fechaConsumo": f"{day.day:02d} {sample_pages.MONTHS[day.month - 1]} {day.year}",
+                    "horaConsumo": f"{hour:02d}:00",
+                    "consumo": f"{consumption:.3f}".replace('.', ','),
+                    "lectura": f"{reading:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+                })
+            day += timedelta(days=1)
+        return rows
+
+    # --- Middleware: latency, injected errors, counters ---
+    @web.middleware
+    async def middleware(self, request, handler):
+        if request.path == "/_stats": return await handler(request)
+        self.stats["requests"] += 1
+        if self.opts.latency: await asyncio.sleep(random.expovariate(1 / self.opts.latency))
+        if self.opts.error_rate and random.random() < self.opts.error_rate:
+            self.stats["injected_errors"] += 1
+            return web.Response(status=503, text="Service Temporarily Unavailable")
+        return await handler(request)
+
+    def _html(self, text, cookies):
+        response = web.Response(text=text, content_type="text/html")
+        for name, value in cookies.items(): response.set_cookie(name, value, path="/", httponly=True)
+        return response
+
+    def _redirect(self, location, cookies):
+        response = web.HTTPFound(location)
+        for name, value in cookies.items(): response.set_cookie(name, value, path="/", httponly=True)
+        return response
+
+    # --- Handlers ---
+    async def login_get(self, request):
+        cookies = {}; session = self._session(request, cookies)
+        self.stats["login_page"] += 1
+        return self._html(sample_pages.login_page(p_auth=session["login_p_auth"], base_url=self.opts.public_url), cookies)
+
+    async def login_post(self, request):
+        cookies = {}; session = self._session(request, cookies)
+        form = await request.post()
+        if request.query.get("p_auth") != session["login_p_auth"] and form.get("p_auth") != session["login_p_auth"]:
+            self.stats["login_bad_token"] += 1
+            raise self._redirect(f"{LOGIN_PATH}?error=token", cookies)
+        user = form.get("_CustomLoginPortlet_login")
+        if not user or form.get("_CustomLoginPortlet_password") != self.opts.password:
+            self.stats["login_failed"] += 1
+            raise self._redirect(f"{LOGIN_PATH}?error=credentials", cookies)
+        session.update(user=user, logged_in=time.monotonic(), page_p_auth=None)
+        self.stats["logins"] += 1
+        raise self._redirect(CONSUMOS_PATH, cookies)
+
+    async def consumos(self, request):
+        cookies = {}; session = self._session(request, cookies)
+        if not self._authenticated(session): raise self._redirect(LOGIN_PATH, cookies)
+        query = request.query
+        if query.get("_MisConsumos_op") != "buscarConsumosHoraria":
+            self.stats["consumos_page"] += 1
+            return self._html(sample_pages.consumos_page(p_auth=self._page_token(session)), cookies)
+
+        self.stats["hourly_api"] += 1
+        token_expired = self.opts.token_ttl and time.monotonic() - session["token_issued"] > self.opts.token_ttl
+        if query.get("p_auth") != session["page_p_auth"] or token_expired:
+            self.stats["hourly_api_bad_token"] += 1
+            return self._html("<html><body>Ha ocurrido un error (PrincipalException)</body></html>", cookies)
+        try:
+            start = datetime.strptime(query["_MisConsumos_fechaInicio"], "%d/%m/%Y").date()
+            end = datetime.strptime(query["_MisConsumos_fechaFin"], "%d/%m/%Y").date()
+            inicio = int(query.get("_MisConsumos_inicio", 0)); fin = int(query.get("_MisConsumos_fin", 1 << 30))
+        except (KeyError, ValueError):
+            return web.json_response({"error": "bad parameters"}, status=400)
+        contracts = self._contracts(session["user"])
+        contract = query.get("_MisConsumos_contrato") or contracts[0]
+        rows = self._rows(contract, start, end) if contract in contracts else []
+        page = rows[inicio:fin]
+        self.stats["hourly_rows"] += len(page)
+        response = web.json_response({"consumos": page, "total": len(rows)})
+        for name, value in cookies.items(): response.set_cookie(name, value, path="/")
+        return response
+
+    async def contracts(self, request):
+        cookies = {}; session = self._session(request, cookies)
+        if not self._authenticated(session): raise self._redirect(LOGIN_PATH, cookies)
+        self.stats["contracts_page"] += 1
+        first = int(self._contracts(session["user"])[0])
+        return self._html(sample_pages.contratos_page(contracts=self.opts.contracts, first_number=first), cookies)
+
+    async def stats_view(self, request):
+        uptime = time.monotonic() - self.started
+        return web.json_response({**self.stats, "sessions": len(self.sessions), "uptime": round(uptime, 1),
+                                  "requests_per_second": round(self.stats["requests"] / uptime, 2) if uptime else 0.0})
+
+    def app(self):
+        """Return the aiohttp application."""
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get(LOGIN_PATH, self.login_get)
+        app.router.add_post(LOGIN_PATH, self.login_post)
+        app.router.add_get(CONSUMOS_PATH, self.consumos)
+        app.router.add_get(CONTRACTS_PATH, self.contracts)
+        app.router.add_get("/_stats", self.stats_view)
+        return app
+
+
+def parse_args(argv):
+    """Parse the command line options."""
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--host", default="localhost", help="host name (not an IP: the client cookie jar ignores IP hosts)")
+    args.add_argument("--port", type=int, default=8765)
+    args.add_argument("--password", default="secret", help="password accepted for every username")
+    args.add_argument("--latency", type=float, default=0.0, help="mean added latency in seconds (exponential)")
+    args.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 503")
+    args.add_argument("--session-ttl", type=float, default=0.0, help="seconds until a login expires (0: never)")
+    args.add_argument("--token-ttl", type=float, default=0.0, help="seconds until the page p_auth rotates (0: never)")
+    args.add_argument("--contracts", type=int, default=1, help="contracts per account")
+    args.add_argument("--history-days", type=int, default=400, help="days of hourly data per contract")
+    args.add_argument("--delay-hours", type=int, default=2, help="publication delay of the newest hour")
+    opts = args.parse_args(argv[1:])
+    opts.public_url = f"http://{opts.host}:{opts.port}"
+    return opts
+
+
+def main(argv):
+    opts = parse_args(argv)
+    print(f"Fake portal on {opts.public_url} (password: {opts.password!r})")
+    web.run_app(FakePortal(opts).app(), host=opts.host, port=opts.port, print=None)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,104 @@
+"""Load test: many simulated accounts polling the local stand-in portal (scripts/fake_portal.py).
+
+Usage:
+    python scripts/load_portal.py [--accounts 200] [--rounds 3] [--url http://localhost:8765]
+                                  [--portal "--latency 0.2 --error-rate 0.01"] [--gate]
+
+Without --url the fake portal is started in-process with the options given in
+--portal. Each account logs in and then polls `rounds` times like the coordinator
+does; the script reports throughput, per-request and per-poll latency percentiles,
+failures and the client CPU time per poll. --gate routes every request through a
+shared RequestGate as inside Home Assistant.
+Requires Home Assistant and aiohttp (the integration modules are imported).
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import shlex
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fake_portal  # noqa: E402
+from bench_hotpaths import load_package  # noqa: E402
+
+
+def _percentiles(samples):
+    if not samples: return "n/a"
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3
+    return f"p50 {pick(0.50):8.1f} ms  p95 {pick(0.95):8.1f} ms  p99 {pick(0.99):8.1f} ms  max {ordered[-1] * 1e3:8.1f} ms"
+
+
+async def _run(opts):
+    load_package()
+    api_module = importlib.import_module("aigues_horta.aigues_horta_api")
+    scheduler = importlib.import_module("aigues_horta.scheduler")
+    const = importlib.import_module("aigues_horta.const")
+
+    request_times = []; poll_times = []; login_times = []; failures = Counter()
+
+    class TimedAPI(api_module.AiguesHortaAsyncAPI):
+        async def _async_send(self, method, url, **kwargs):
+            started = time.perf_counter()
+            try: return await super()._async_send(method, url, **kwargs)
+            finally: request_times.append(time.perf_counter() - started)
+
+    runner = None; url = opts.url
+    if not url:
+        portal_opts = fake_portal.parse_args(["fake_portal"] + shlex.split(opts.portal))
+        runner = fake_portal.web.AppRunner(fake_portal.FakePortal(portal_opts).app())
+        await runner.setup()
+        await fake_portal.web.TCPSite(runner, portal_opts.host, portal_opts.port).start()
+        url = portal_opts.public_url
+
+    gate = scheduler.RequestGate(const.SCHEDULER_MAX_CONCURRENCY, const.SCHEDULER_RATE, const.SCHEDULER_BURST) if opts.gate else None
+
+    async def _account(index):
+        api = TimedAPI(f"user{index:05d}", opts.password, base_url=url, request_gate=gate)
+        try:
+            started = time.perf_counter()
+            try: await api.async_login()
+            except Exception as err: failures[f"login: {type(err).__name__}"] += 1; return
+            login_times.append(time.perf_counter() - started)
+            for _ in range(opts.rounds):
+                started = time.perf_counter()
+                try: await api.async_get_consumption_data(const.DEFAULT_DAYS_BACK)
+                except Exception as err: failures[f"poll: {type(err).__name__}"] += 1
+                else: poll_times.append(time.perf_counter() - started)
+                if opts.interval: await asyncio.sleep(opts.interval)
+        finally:
+            await api.async_close()
+
+    wall = time.perf_counter(); cpu = time.process_time()
+    await asyncio.gather(*(_account(i) for i in range(opts.accounts)))
+    wall = time.perf_counter() - wall; cpu = time.process_time() - cpu
+    if runner: await runner.cleanup()
+
+    print(f"{opts.accounts} accounts x {opts.rounds} polls against {url} in {wall:.1f} s")
+    print(f"requests: {len(request_times):7d}  {len(request_times) / wall:8.1f} req/s   {_percentiles(request_times)}")
+    print(f"logins:   {len(login_times):7d}  {'':14}{_percentiles(login_times)}")
+    print(f"polls:    {len(poll_times):7d}  {len(poll_times) / wall:8.1f} poll/s  {_percentiles(poll_times)}")
+    if poll_times: print(f"client CPU: {cpu:.2f} s total, {cpu / len(poll_times) * 1e3:.2f} ms per poll (mean poll {statistics.mean(poll_times) * 1e3:.1f} ms)")
+    if gate: print(f"gate: {gate.stats()}")
+    for reason, count in failures.most_common(): print(f"failed {reason}: {count}")
+    return 1 if failures else 0
+
+
+def main(argv):
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--accounts", type=int, default=200)
+    args.add_argument("--rounds", type=int, default=3, help="polls per account after the login")
+    args.add_argument("--interval", type=float, default=0.0, help="seconds between an account's polls")
+    args.add_argument("--url", help="base URL of a running fake portal (default: start one in-process)")
+    args.add_argument("--portal", default="", help="options for the in-process fake portal")
+    args.add_argument("--password", default="secret")
+    args.add_argument("--gate", action="store_true", help="share one RequestGate between all accounts")
+    return asyncio.run(_run(args.parse_args(argv[1:])))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
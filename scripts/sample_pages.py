@@ -0,0 +1,102 @@
+"""Synthetic, anonymized stand-ins for the portal pages (for benchmarks and local testing).
+
+The structure mirrors the Liferay pages the client parses: a large head full of
+scripts/styles, navigation, and the relevant portlet near the end of the body.
+"""
+import random
+
+_FILLER_SCRIPT = (
+    "<script type=\"text/javascript\">\n"
+    "/*<![CDATA[*/ AUI().use('aui-base', 'liferay-menu', function(A) {{ var node{i} = A.one('#nav-{i}');"
+    " if (node{i}) {{ node{i}.on('click', function(e) {{ Liferay.Util.toggleDisabled('#item-{i}', true); }}); }} }}); /*]]>*/\n"
+    "</script>\n"
+)
+_FILLER_STYLE = "<link href=\"/o/aigues-theme/css/main_{i}.css?browserId=other&themeId=aigues_WAR_theme&minifierType=css\" rel=\"stylesheet\" type=\"text/css\" />\n"
+_NAV_ITEM = "<li class=\"lfr-nav-item\"><a href=\"/es/web/aigues-de-l-horta/seccion-{i}\" role=\"menuitem\"><span>Sección {i}</span></a></li>\n"
+
+
+def _head(title, scripts, styles):
+    parts = ["<!DOCTYPE html>\n<html class=\"ltr\" dir=\"ltr\" lang=\"es-ES\">\n<head>\n", f"<title>{title} - Aigües de l'Horta</title>\n"]
+    parts += [_FILLER_STYLE.format(i=i) for i in range(styles)]
+    parts += [_FILLER_SCRIPT.format(i=i) for i in range(scripts)]
+    parts.append("</head>\n")
+    return "".join(parts)
+
+
+def _nav(items):
+    return "<nav id=\"navigation\"><ul aria-label=\"Páginas del sitio\" role=\"menubar\">\n" + "".join(_NAV_ITEM.format(i=i) for i in range(items)) + "</ul></nav>\n"
+
+
+def login_page(p_auth="Ab12Cd34", scripts=60, styles=20, nav_items=40, base_url="https://www.aigueshorta.es"):
+    """Return a login page with the loginForm (p_auth in the action URL and a hidden input)."""
+    action = (
+        f"{base_url}/login?p_p_id=CustomLoginPortlet&amp;p_p_lifecycle=1&amp;p_p_state=normal"
+        f"&amp;p_p_mode=view&amp;_CustomLoginPortlet_javax.portlet.action=%2Flogin%2Flogin&amp;p_auth={p_auth}"
+    )
+    form = (
+        f"<form action=\"{action}\" class=\"form\" id=\"loginForm\" method=\"post\" name=\"loginForm\">\n"
+        "<input name=\"_CustomLoginPortlet_formDate\" type=\"hidden\" value=\"1714117200000\" />\n"
+        "<input class=\"field\" id=\"_CustomLoginPortlet_saveLastPath\" name=\"_CustomLoginPortlet_saveLastPath\" type=\"hidden\" value=\"false\" />\n"
+        "<input class=\"field\" id=\"_CustomLoginPortlet_redirect\" name=\"_CustomLoginPortlet_redirect\" type=\"hidden\" value=\"\" />\n"
+        f"<input name=\"p_auth\" type=\"hidden\" value=\"{p_auth}\" />\n"
+        "<input class=\"field form-control\" id=\"_CustomLoginPortlet_login\" name=\"_CustomLoginPortlet_login\" type=\"text\" value=\"\" />\n"
+        "<input class=\"field form-control\" id=\"_CustomLoginPortlet_password\" name=\"_CustomLoginPortlet_password\" type=\"password\" value=\"\" />\n"
+        "<button class=\"btn btn-primary\" type=\"submit\">Acceder</button>\n</form>\n"
+    )
+    body = "<body class=\"controls-visible signed-out\">\n" + _nav(nav_items) + "<section id=\"portlet_CustomLoginPortlet\">\n" + form + "</section>\n</body>\n</html>\n"
+    return _head("Acceso", scripts, styles) + body
+
+
+def consumos_page(p_auth="Ab12Cd34", scripts=120, styles=30, nav_items=60, table_rows=200):
+    """Return a mis-consumos page; the p_auth only appears inside the MisConsumos portlet."""
+    rows = "".join(
+        f"<tr><td>{i // 24 % 28 + 1:02d} abr 2025</td><td>{i % 24:02d}:00</td><td>0,{i % 24:03d}</td><td>1.234,{i % 1000:03d}</td></tr>\n"
+        for i in range(table_rows)
+    )
+    portlet = (
+        "<div class=\"portlet-boundary portlet-boundary_MisConsumos_\" id=\"p_p_id_MisConsumos_\">\n"
+        "<form action=\"https://www.aigueshorta.es/es/group/aigues-de-l-horta/mis-consumos?p_p_id=MisConsumos&amp;p_p_lifecycle=1"
+        f"&amp;p_p_state=normal&amp;p_p_mode=view&amp;_MisConsumos_javax.portlet.action=buscar&amp;p_auth={p_auth}\" id=\"_MisConsumos_fm\" method=\"post\">\n"
+        "<input name=\"_MisConsumos_fechaInicio\" type=\"text\" value=\"\" />\n</form>\n"
+        f"<table class=\"table consumos\"><thead><tr><th>Fecha</th><th>Hora</th><th>Consumo</th><th>Lectura</th></tr></thead><tbody>\n{rows}</tbody></table>\n"
+        "</div>\n"
+    )
+    body = "<body class=\"controls-visible signed-in\">\n" + _nav(nav_items) + portlet + "</body>\n</html>\n"
+    return _head("Mis consumos", scripts, styles) + body
+
+
+MONTHS = ['ene', 'feb', 'mar', 'abr', 'may', 'jun', 'jul', 'ago', 'sep', 'oct', 'nov', 'dic']
+
+
+def consumos_rows(count, start_year=2025, seed=1):
+    """Return `count` consumos rows (oldest first) shaped like the buscarConsumosHoraria JSON."""
+    import datetime
+
+    rng = random.Random(seed)
+    reading = 1234.0
+    start = datetime.datetime(start_year, 1, 1)
+    rows = []
+    for i in range(count):
+        ts = start + datetime.timedelta(hours=i)
+        consumption = round(rng.choice([0, 0, 0, 0.001, 0.002, 0.005, 0.012, 0.03]), 3)
+        reading += consumption
+        rows.append({
+            "fechaConsumo": f"{ts.day:02d} {MONTHS[ts.month - 1]} {ts.year}",
+            "horaConsumo": f"{ts.hour:02d}:00",
+            "consumo": f"{consumption:.3f}".replace('.', ','),
+            "lectura": f"{reading:,.3f}".replace(',', 'X').replace('.', ',').replace('X', '.'),
+        })
+    return rows
+
+
+def contratos_page(contracts=2, first_number=40000000, scripts=80, styles=20, nav_items=40):
+    """Return a contratos page with `contracts` contract cards (number and supply address)."""
+    cards = "".join(
+        "<div class=\"contract-card\">\n"
+        f"<p><strong>Nº Contrato:</strong> {first_number + i * 7919}</p>\n"
+        f"<p>Dirección Suministro: Carrer de la Séquia {i + 1}, 46100 Burjassot</p>\n"
+        "<p>Titular: *** ***</p>\n</div>\n"
+        for i in range(contracts)
+    )
+    body = "<body class=\"controls-visible signed-in\">\n" + _nav(nav_items) + "<section id=\"portlet_MisContratos\">\n" + cards + "</section>\n</body>\n</html>\n"
+    return _head("Mis contratos", scripts, styles) + body
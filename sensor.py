@@ -1,7 +1,6 @@
 """Sensor platform for Aigües de l'Horta integration."""
 import logging
 from typing import Callable, Dict, Optional, Any
-from collections import OrderedDict
 from datetime import datetime
 
 from homeassistant.components.sensor import (
@@ -10,37 +9,127 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfVolume
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime, UnitOfVolume
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
-from homeassistant.util import dt as dt_util # For timezone handling
+from homeassistant.util import dt as dt_util
+
+from .aggregates import (
+    PERIOD_LAST_24H, PERIOD_MONTH, PERIOD_TODAY, PERIOD_WEEK, PERIOD_YESTERDAY, PERIODS, month_start, week_start,
+)
 
 from .const import (
-    ATTR_ADDRESS, ATTR_CONTRACT_NUMBER,
-    ATTR_HOURLY_CONSUMPTION, DOMAIN,
+    ATTR_ADDRESS, ATTR_CONTRACT_NUMBER, ATTR_HOURLY_CONSUMPTION,
+    CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE, DOMAIN, SIGNAL_POLL_DONE,
 )
+from .metrics import (
+    COUNTER_BYTES, COUNTER_NEW_ROWS, COUNTER_REQUESTS, COUNTER_RETRIES, COUNTER_ROWS,
+    PHASE_CONSUMPTION_PAGE, PHASE_CONTRACTS, PHASE_HOURLY_API, PHASE_LOGIN,
+    PHASE_P_AUTH_PARSE, PHASE_POLL, PHASE_PROCESS_ROWS,
+)
+from .series import HourlySeries
 
 _LOGGER = logging.getLogger(__name__)
 
+# Phases with a timing sensor (only the whole poll is enabled by default)
+TIMED_PHASES = (PHASE_POLL, PHASE_LOGIN, PHASE_CONSUMPTION_PAGE, PHASE_P_AUTH_PARSE, PHASE_HOURLY_API, PHASE_PROCESS_ROWS, PHASE_CONTRACTS)
+
+PERIOD_NAMES = {
+    PERIOD_TODAY: "Today Consumption", PERIOD_YESTERDAY: "Yesterday Consumption",
+    PERIOD_WEEK: "This Week Consumption", PERIOD_MONTH: "This Month Consumption",
+    PERIOD_LAST_24H: "Last 24h Consumption",
+}
+
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Aigües de l'Horta sensors."""
     coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    # The primary contract keeps the original (contract-less) unique ids
     sensors = [
         AiguesHortaMeterReadingSensor(coordinator, entry), # Renamed for clarity
         AiguesHortaHourlyConsumptionSensor(coordinator, entry)
-    ]
-    async_add_entities(sensors, True)
+    ] + [AiguesHortaPeriodConsumptionSensor(coordinator, entry, period) for period in PERIODS]
+    known_keys = set(coordinator.contract_keys[:1])
+
+    def _contract_sensors():
+        """Return sensors for contracts not seen before (multi-contract accounts)."""
+        new_sensors = []
+        for key in coordinator.contract_keys[1:]:
+            if key in known_keys: continue
+            known_keys.add(key)
+            new_sensors += [
+                AiguesHortaMeterReadingSensor(coordinator, entry, key),
+                AiguesHortaHourlyConsumptionSensor(coordinator, entry, key),
+            ] + [AiguesHortaPeriodConsumptionSensor(coordinator, entry, period, key) for period in PERIODS]
+        return new_sensors
+
+    if gate := hass.data[DOMAIN].get("request_gate"):
+        sensors.append(AiguesHortaRequestWaitSensor(coordinator, entry, gate))
+    sensors += [AiguesHortaPhaseTimingSensor(coordinator, entry, phase) for phase in TIMED_PHASES]
+    sensors.append(AiguesHortaPollTrafficSensor(coordinator, entry))
+
+    async_add_entities(sensors + _contract_sensors()) # No update_before_add: it would request an extra poll
+
+    @callback
+    def _async_add_new_contracts() -> None:
+        if new_sensors := _contract_sensors(): async_add_entities(new_sensors)
+
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_contracts))
+
+
+class AiguesHortaContractEntity(CoordinatorEntity):
+    """Base for sensors bound to one contract of the account (the primary one by default)."""
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, contract_key: Optional[str] = None) -> None:
+        """Initialize the entity."""
+        super().__init__(coordinator)
+        self._entry = entry
+        self._contract_key = contract_key
+        self._last_snapshot = None
+
+    def _contract_data(self) -> Optional[Dict[str, Any]]:
+        """Return this sensor's contract data from the coordinator."""
+        data = self.coordinator.data
+        if not data: return None
+        contracts = data.get("contracts") or {}
+        if self._contract_key is None: return contracts.get(data.get("primary"), data)
+        return contracts.get(self._contract_key)
+
+    @property
+    def available(self) -> bool:
+        """Return True if the coordinator has data for this contract."""
+        return super().available and self._contract_data() is not None
+
+    def _unique_id(self, suffix: str) -> str:
+        if self._contract_key is None: return f"{DOMAIN}_{self._entry.entry_id}_{suffix}"
+        return f"{DOMAIN}_{self._entry.entry_id}_{self._contract_key}_{suffix}"
+
+    def _base_name(self) -> str:
+        if self._contract_key is None: return f"Aigües de l'Horta {self._entry.title}"
+        return f"Aigües de l'Horta {self._entry.title} {self._contract_key}"
+
+    def _state_snapshot(self) -> tuple:
+        return (self.available, self.native_value, self.extra_state_attributes)
+
+    @callback
+    def _async_write_state_if_changed(self) -> None:
+        """Write the state only if availability, value or attributes changed (each write is a recorder row)."""
+        snapshot = self._state_snapshot()
+        if snapshot == self._last_snapshot: return
+        self._last_snapshot = snapshot
+        self.async_write_ha_state()
 
 
 # Renamed for clarity vs Hourly Consumption
-class AiguesHortaMeterReadingSensor(CoordinatorEntity, SensorEntity):
+class AiguesHortaMeterReadingSensor(AiguesHortaContractEntity, SensorEntity):
     """Sensor representing the latest water meter reading."""
     _attr_has_entity_name = True
     _attr_device_class = SensorDeviceClass.WATER
@@ -48,13 +137,14 @@ class AiguesHortaMeterReadingSensor(CoordinatorEntity, SensorEntity):
     _attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
     _attr_icon = "mdi:counter"
 
-    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, contract_key: Optional[str] = None) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._entry = entry; self._attrs = {}
-        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_meter_reading" # Stable ID
-        self._contract_id = coordinator.data.get("contract_number", entry.entry_id) if coordinator.data else entry.entry_id
-        base_name = f"Aigües de l'Horta {entry.title}"
+        super().__init__(coordinator, entry, contract_key)
+        self._attrs = {}
+        self._attr_unique_id = self._unique_id("meter_reading") # Stable ID
+        contract_data = self._contract_data()
+        self._contract_id = (contract_data.get("contract_number") or entry.entry_id) if contract_data else entry.entry_id
+        base_name = self._base_name()
         self._attr_name = f"{base_name} Meter Reading"
         self._attr_device_info = { # Device info using contract_id
             "identifiers": {(DOMAIN, self._contract_id)}, "name": base_name,
@@ -62,12 +152,13 @@ class AiguesHortaMeterReadingSensor(CoordinatorEntity, SensorEntity):
             "model": f"Meter ({self._contract_id})" if self._contract_id != entry.entry_id else "Meter",
             "entry_type": "service",
         }
-        if coordinator.data: self._update_attrs()
+        if contract_data: self._update_attrs()
 
     @property
     def native_value(self) -> StateType:
         """Return the state (latest meter reading)."""
-        if self.coordinator.data: return self.coordinator.data.get("current_consumption")
+        contract_data = self._contract_data()
+        if contract_data: return contract_data.get("current_consumption")
         return None
 
     @property
@@ -79,20 +170,21 @@ class AiguesHortaMeterReadingSensor(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data."""
         # Update device info if contract ID changes
-        if self.coordinator.data:
-            new_contract_id = self.coordinator.data.get("contract_number", self._entry.entry_id)
+        contract_data = self._contract_data()
+        if contract_data:
+            new_contract_id = contract_data.get("contract_number") or self._entry.entry_id
             if self._contract_id != new_contract_id:
                  self._contract_id = new_contract_id
                  self._attr_device_info["identifiers"] = {(DOMAIN, self._contract_id)}
                  self._attr_device_info["model"] = f"Meter ({self._contract_id})" if self._contract_id != self._entry.entry_id else "Meter"
         self._update_attrs()
-        self.async_write_ha_state()
+        self._async_write_state_if_changed()
 
     def _update_attrs(self) -> None:
         """Update sensor attributes."""
         attrs = {}
-        if self.coordinator.data:
-            data = self.coordinator.data
+        data = self._contract_data()
+        if data:
             attrs[ATTR_CONTRACT_NUMBER] = data.get("contract_number")
             attrs[ATTR_ADDRESS] = data.get("address")
             attrs["last_reading_date"] = data.get("last_reading_date") # Date of latest reading
@@ -101,7 +193,7 @@ class AiguesHortaMeterReadingSensor(CoordinatorEntity, SensorEntity):
         self._attrs = attrs
 
 
-class AiguesHortaHourlyConsumptionSensor(CoordinatorEntity, SensorEntity):
+class AiguesHortaHourlyConsumptionSensor(AiguesHortaContractEntity, SensorEntity):
     """Sensor for the water consumption during the most recent hour."""
 
     _attr_has_entity_name = True
@@ -110,62 +202,44 @@ class AiguesHortaHourlyConsumptionSensor(CoordinatorEntity, SensorEntity):
     _attr_state_class = SensorStateClass.TOTAL
     _attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
     _attr_icon = "mdi:water-pump" # Icon suggesting flow/usage
+    # Shown in the UI but never stored by the recorder (the history lives in the local store)
+    _unrecorded_attributes = frozenset({"hourly_consumption_history"})
 
-    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, contract_key: Optional[str] = None) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._entry = entry; self._attrs = {}
-        # Keep track of the timestamp string for the current value
-        self._current_value_timestamp_str: Optional[str] = None
-        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_hourly_consumption" # Stable ID
-        self._contract_id = coordinator.data.get("contract_number", entry.entry_id) if coordinator.data else entry.entry_id
-        base_name = f"Aigües de l'Horta {entry.title}"
+        super().__init__(coordinator, entry, contract_key)
+        self._attrs = {}
+        self._history_attribute = entry.options.get(CONF_HISTORY_ATTRIBUTE, DEFAULT_HISTORY_ATTRIBUTE)
+        self._attr_unique_id = self._unique_id("hourly_consumption") # Stable ID
+        contract_data = self._contract_data()
+        self._contract_id = (contract_data.get("contract_number") or entry.entry_id) if contract_data else entry.entry_id
+        base_name = self._base_name()
         self._attr_name = f"{base_name} Hourly Consumption"
         self._attr_device_info = { # Link to the same device
             "identifiers": {(DOMAIN, self._contract_id)}, "name": base_name,
             "manufacturer": "Aigües de l'Horta",
             "model": f"Meter ({self._contract_id})" if self._contract_id != self._entry.entry_id else "Meter",
         }
-        if coordinator.data: self._update_attrs()
+        if contract_data: self._update_attrs()
+
+    def _latest(self):
+        """Return the newest (datetime, consumption, reading) row of this contract, or None (O(1))."""
+        contract_data = self._contract_data()
+        hourly = contract_data.get(ATTR_HOURLY_CONSUMPTION) if contract_data else None
+        return hourly.latest() if isinstance(hourly, HourlySeries) else None
 
     @property
     def native_value(self) -> StateType:
         """Return the state (consumption amount for the last hour)."""
-        latest_value = None
-        new_timestamp_str = None # Store the timestamp associated with this value
-        if self.coordinator.data and ATTR_HOURLY_CONSUMPTION in self.coordinator.data:
-            hourly_data = self.coordinator.data[ATTR_HOURLY_CONSUMPTION]
-            if isinstance(hourly_data, dict) and hourly_data:
-                try:
-                    valid_keys = sorted([k for k in hourly_data.keys() if isinstance(k, str)])
-                    if valid_keys:
-                        latest_timestamp_str = valid_keys[-1]
-                        latest_value = hourly_data[latest_timestamp_str]
-                        new_timestamp_str = latest_timestamp_str # Found timestamp for current value
-                except Exception as e: _LOGGER.debug("Error getting latest hourly value: %s.", e)
-
-        # Store the timestamp string internally to be used by last_reset
-        self._current_value_timestamp_str = new_timestamp_str
-        return latest_value
-
-    # *** REINTRODUCED last_reset PROPERTY ***
+        latest = self._latest()
+        return latest[1] if latest else None
+
     @property
     def last_reset(self) -> datetime | None:
         """Return the start time of the hourly interval for the current value."""
-        # If the native_value represents consumption from 10:00 to 11:00,
-        # last_reset should be the datetime object for 10:00:00.
-        if self._current_value_timestamp_str:
-            try:
-                # The timestamp string (e.g., "2025-04-26T10:00:00") IS the start of the hour.
-                dt_object = dt_util.parse_datetime(self._current_value_timestamp_str)
-                # Ensure it's timezone-aware if possible (using HA's timezone)
-                # return dt_util.as_local(dt_object) if dt_object else None # Might cause issues if naive
-                return dt_object # Return the parsed datetime object
-            except (ValueError, TypeError):
-                 _LOGGER.warning("Could not parse timestamp for last_reset: '%s'", self._current_value_timestamp_str)
-                 return None
-        _LOGGER.debug("last_reset is None because _current_value_timestamp_str is None")
-        return None
+        # If the native_value represents consumption from 10:00 to 11:00, last_reset is 10:00:00
+        latest = self._latest()
+        return latest[0] if latest else None
 
     @property
     def extra_state_attributes(self) -> Dict[str, Any]:
@@ -176,8 +250,9 @@ class AiguesHortaHourlyConsumptionSensor(CoordinatorEntity, SensorEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data."""
         # Update device info if contract ID changes
-        if self.coordinator.data:
-            new_contract_id = self.coordinator.data.get("contract_number", self._entry.entry_id)
+        contract_data = self._contract_data()
+        if contract_data:
+            new_contract_id = contract_data.get("contract_number") or self._entry.entry_id
             if self._contract_id != new_contract_id:
                  self._contract_id = new_contract_id
                  self._attr_device_info["identifiers"] = {(DOMAIN, self._contract_id)}
@@ -185,29 +260,215 @@ class AiguesHortaHourlyConsumptionSensor(CoordinatorEntity, SensorEntity):
 
         self._update_attrs()
         # Value and last_reset are calculated dynamically by properties when state is written
-        self.async_write_ha_state()
+        self._async_write_state_if_changed()
+
+    def _state_snapshot(self) -> tuple:
+        return super()._state_snapshot() + (self.last_reset,)
 
     def _update_attrs(self) -> None:
         """Update sensor attributes."""
         attrs = {}
-        if self.coordinator.data:
-            data = self.coordinator.data
+        data = self._contract_data()
+        if data:
             attrs[ATTR_CONTRACT_NUMBER] = data.get("contract_number")
             attrs[ATTR_ADDRESS] = data.get("address")
 
-            # Add hourly consumption history
-            hourly_data = data.get(ATTR_HOURLY_CONSUMPTION)
-            if isinstance(hourly_data, dict) and hourly_data:
-                try:
-                    valid_keys = sorted([k for k in hourly_data.keys() if isinstance(k, str)], reverse=True)[:24]
-                    sorted_hourly_history = OrderedDict((k, hourly_data[k]) for k in valid_keys)
-                    attrs["hourly_consumption_history"] = dict(sorted_hourly_history)
-                    # Add timestamp of the latest data point in history (same as used for native_value)
-                    if valid_keys: attrs["last_updated_hour"] = valid_keys[0]
-                except Exception as e:
-                     _LOGGER.error("Error processing hourly attrs: %s", e)
-                     attrs["hourly_consumption_history"] = "Error"
-            else: attrs["hourly_consumption_history"] = {}
+            # Add hourly consumption history (compact mode: websocket API only, see websocket.py)
+            hourly = data.get(ATTR_HOURLY_CONSUMPTION)
+            if isinstance(hourly, HourlySeries) and hourly:
+                if self._history_attribute: # Newest first, 24 hours: constant work per update
+                    attrs["hourly_consumption_history"] = {
+                        ts.isoformat(timespec='seconds'): consumption for ts, consumption, _ in reversed(list(hourly.tail(24)))
+                    }
+                attrs["last_updated_hour"] = hourly.latest_hour.isoformat(timespec='seconds')
+            elif self._history_attribute: attrs["hourly_consumption_history"] = {}
         self._attrs = attrs
 
+
+class AiguesHortaPeriodConsumptionSensor(AiguesHortaContractEntity, SensorEntity):
+    """Consumption of the current day, week or month, of yesterday or of the last 24 hours.
+
+    Reads the coordinator's running totals (O(1) per update); a local-midnight timer
+    rolls the calendar periods over even when the portal publishes nothing.
+    """
+
+    _attr_has_entity_name = True
+    _attr_device_class = SensorDeviceClass.WATER
+    _attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
+    _attr_icon = "mdi:water"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, period: str, contract_key: Optional[str] = None) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry, contract_key)
+        self._period = period
+        # Running periods reset at their start; yesterday and the rolling window are plain values
+        self._attr_state_class = SensorStateClass.TOTAL if period in (PERIOD_TODAY, PERIOD_WEEK, PERIOD_MONTH) else None
+        self._attr_unique_id = self._unique_id(f"{period}_consumption")
+        contract_data = self._contract_data()
+        contract_id = (contract_data.get("contract_number") or entry.entry_id) if contract_data else entry.entry_id
+        base_name = self._base_name()
+        self._attr_name = f"{base_name} {PERIOD_NAMES[period]}"
+        self._attr_device_info = { # Link to the same device
+            "identifiers": {(DOMAIN, contract_id)}, "name": base_name,
+            "manufacturer": "Aigües de l'Horta",
+            "model": f"Meter ({contract_id})" if contract_id != entry.entry_id else "Meter",
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """Register the midnight rollover."""
+        await super().async_added_to_hass()
+        if self._period != PERIOD_LAST_24H: # The rolling window only moves with new data
+            self.async_on_remove(async_track_time_change(self.hass, self._async_midnight, hour=0, minute=0, second=0))
+
+    @callback
+    def _async_midnight(self, now: datetime) -> None:
+        self._async_write_state_if_changed()
+
+    def _totals(self):
+        key = self.coordinator.contract_keys[0] if self._contract_key is None else self._contract_key
+        return self.coordinator.period_totals.get(key)
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the m³ of the period (None until the first poll)."""
+        totals = self._totals()
+        return totals.total(self._period, dt_util.now().date()) if totals else None
+
+    @property
+    def last_reset(self) -> datetime | None:
+        """Return the local start of the running day, week or month."""
+        today = dt_util.now().date()
+        if self._period == PERIOD_TODAY: return dt_util.start_of_local_day(today)
+        if self._period == PERIOD_WEEK: return dt_util.start_of_local_day(week_start(today))
+        if self._period == PERIOD_MONTH: return dt_util.start_of_local_day(month_start(today))
+        return None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the newest hour included in the total."""
+        totals = self._totals()
+        return {"last_updated_hour": totals.newest.isoformat(timespec='seconds') if totals and totals.newest else None}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data."""
+        self._async_write_state_if_changed()
+
+    def _state_snapshot(self) -> tuple:
+        return super()._state_snapshot() + (self.last_reset,)
+
+
+class AiguesHortaDiagnosticEntity(CoordinatorEntity):
+    """Base for the client diagnostic sensors: written after every poll, not only when the data changed."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._poll_signal = SIGNAL_POLL_DONE.format(entry.entry_id)
+
+    async def async_added_to_hass(self) -> None:
+        """Listen to the entry's poll signal."""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_dispatcher_connect(self.hass, self._poll_signal, self.async_write_ha_state))
+
+
+class AiguesHortaRequestWaitSensor(AiguesHortaDiagnosticEntity, SensorEntity):
+    """Diagnostic sensor: average time this entry's portal requests waited in the shared queue."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_icon = "mdi:timer-sand"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, gate) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry)
+        self._gate = gate
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_request_wait"
+        self._attr_name = f"Aigües de l'Horta {entry.title} Request Wait"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the average queue wait of this entry's requests."""
+        return round(self._gate.stats(self.coordinator.api.username)["avg_wait"], 2)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return queue depth and request counters of the shared gate."""
+        stats = self._gate.stats(self.coordinator.api.username)
+        return {
+            "queue_depth": stats["queue_depth"],
+            "active_requests": stats["active_requests"],
+            "total_requests": stats["total_requests"],
+            "max_wait": round(stats["max_wait"], 2),
+            "last_wait": round(stats["last_wait"], 2),
+        }
+
+
+class AiguesHortaPhaseTimingSensor(AiguesHortaDiagnosticEntity, SensorEntity):
+    """Diagnostic sensor: rolling median duration of one client phase, p95 and counts as attributes."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_suggested_display_precision = 3
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry, phase: str) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry)
+        self._phase = phase
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_timing_{phase}"
+        self._attr_name = f"Aigües de l'Horta {entry.title} {phase.replace('_', ' ').title()} Time"
+        self._attr_entity_registry_enabled_default = phase == PHASE_POLL
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the rolling median duration of the phase."""
+        stats = self.coordinator.api.metrics.phase_stats(self._phase)
+        return round(stats["p50"], 3) if stats else None
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return p95, the last and longest durations and the call counters."""
+        stats = self.coordinator.api.metrics.phase_stats(self._phase)
+        if not stats: return {}
+        return {
+            "p95": round(stats["p95"], 3), "last": round(stats["last"], 3), "max": round(stats["max"], 3),
+            "count": stats["count"], "errors": stats["errors"],
+        }
+
+
+class AiguesHortaPollTrafficSensor(AiguesHortaDiagnosticEntity, SensorEntity):
+    """Diagnostic sensor: bytes downloaded by the last poll, with request, row and retry counters."""
+
+    _attr_device_class = SensorDeviceClass.DATA_SIZE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfInformation.BYTES
+    _attr_icon = "mdi:download-network-outline"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, entry)
+        self._attr_unique_id = f"{DOMAIN}_{entry.entry_id}_poll_traffic"
+        self._attr_name = f"Aigües de l'Horta {entry.title} Poll Download"
+
+    @property
+    def native_value(self) -> StateType:
+        """Return the bytes downloaded by the last poll."""
+        return self.coordinator.api.metrics.last_poll.get(COUNTER_BYTES, 0)
+
+    @property
+    def extra_state_attributes(self) -> Dict[str, Any]:
+        """Return the last poll's counters and the totals since start."""
+        metrics = self.coordinator.api.metrics
+        counters = (COUNTER_REQUESTS, COUNTER_ROWS, COUNTER_NEW_ROWS, COUNTER_RETRIES)
+        return {
+            **{counter: metrics.last_poll.get(counter, 0) for counter in counters},
+            **{f"total_{counter}": metrics.totals[counter] for counter in (COUNTER_BYTES, *counters)},
+        }
+
 # --- END OF FILE sensor.py ---
@@ -0,0 +1,94 @@
+"""Immutable, time-sorted hourly series backed by `array` (published in the coordinator data)."""
+import math
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+from .history import from_epoch_hour, to_epoch_hour
+
+_NAN = float("nan")
+
+
+def _value(value):
+    return None if math.isnan(value) else value
+
+
+class HourlySeries:
+    """Hourly (hour, consumption, reading) columns sorted by hour.
+
+    Hours are local wall-clock hours since 1970 (history.to_epoch_hour); missing
+    values are stored as NaN and returned as None. `latest()` is O(1) and
+    `slice()` bisects, so sensors do constant work per update whatever the length.
+    """
+
+    __slots__ = ("_hours", "_consumption", "_reading")
+
+    def __init__(self, hours=(), consumption=(), reading=()) -> None:
+        """Initialize from parallel, hour-sorted columns (copied into arrays)."""
+        self._hours = array("q", hours)
+        self._consumption = array("d", consumption)
+        self._reading = array("d", reading)
+        if not len(self._hours) == len(self._consumption) == len(self._reading): raise ValueError("Columns differ in length")
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from [(datetime, consumption, reading)] rows (any order; later duplicates win)."""
+        merged = {to_epoch_hour(ts): (consumption, reading) for ts, consumption, reading in rows}
+        hours = sorted(merged)
+        return cls(
+            hours,
+            [_NAN if merged[h][0] is None else merged[h][0] for h in hours],
+            [_NAN if merged[h][1] is None else merged[h][1] for h in hours],
+        )
+
+    @classmethod
+    def from_mapping(cls, hourly):
+        """Build from an {ISO timestamp: consumption} dict (no readings)."""
+        return cls.from_rows((datetime.fromisoformat(ts), consumption, None) for ts, consumption in hourly.items())
+
+    def __len__(self) -> int:
+        return len(self._hours)
+
+    def __bool__(self) -> bool:
+        return len(self._hours) > 0
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, HourlySeries): return NotImplemented
+        return (self._hours == other._hours and self._consumption.tobytes() == other._consumption.tobytes()
+                and self._reading.tobytes() == other._reading.tobytes()) # Bytewise: NaN equals NaN
+
+    def __iter__(self):
+        """Yield (datetime, consumption, reading) rows, oldest first."""
+        for hour, consumption, reading in zip(self._hours, self._consumption, self._reading):
+            yield from_epoch_hour(hour), _value(consumption), _value(reading)
+
+    def __repr__(self) -> str:
+        return f"HourlySeries({len(self)} hours, latest={self.latest_hour})"
+
+    @property
+    def latest_hour(self) -> datetime | None:
+        """Return the newest hour (its start), or None when empty."""
+        return from_epoch_hour(self._hours[-1]) if self._hours else None
+
+    def latest(self):
+        """Return the newest (datetime, consumption, reading) row, or None when empty."""
+        if not self._hours: return None
+        return from_epoch_hour(self._hours[-1]), _value(self._consumption[-1]), _value(self._reading[-1])
+
+    def slice(self, start: datetime | None = None, end: datetime | None = None) -> "HourlySeries":
+        """Return the rows with start <= hour < end as a new series."""
+        lo = bisect_left(self._hours, to_epoch_hour(start)) if start else 0
+        hi = bisect_left(self._hours, to_epoch_hour(end)) if end else len(self._hours)
+        return HourlySeries(self._hours[lo:hi], self._consumption[lo:hi], self._reading[lo:hi])
+
+    def tail(self, count: int) -> "HourlySeries":
+        """Return the newest `count` rows as a new series."""
+        lo = max(len(self._hours) - count, 0)
+        return HourlySeries(self._hours[lo:], self._consumption[lo:], self._reading[lo:])
+
+    def as_dict(self) -> dict:
+        """Return {ISO timestamp: consumption} for the hours with a known consumption (JSON friendly)."""
+        return {
+            from_epoch_hour(hour).isoformat(timespec="seconds"): consumption
+            for hour, consumption in zip(self._hours, self._consumption) if not math.isnan(consumption)
+        }
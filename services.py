@@ -0,0 +1,82 @@
+"""Services for the Aigües de l'Horta integration."""
+import logging
+
+import voluptuous as vol
+
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .backfill import months_ago
+from .const import (
+    ATTR_CONFIG_ENTRY_ID, ATTR_CONTRACT, ATTR_END, ATTR_MONTHS, ATTR_PARALLEL, ATTR_START,
+    DEFAULT_BACKFILL_MONTHS, DEFAULT_BACKFILL_PARALLEL, DOMAIN, FETCH_HISTORY_MAX_DAYS,
+    SERVICE_BACKFILL_STATISTICS, SERVICE_FETCH_HISTORY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_MONTHS, default=DEFAULT_BACKFILL_MONTHS): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+        vol.Optional(ATTR_PARALLEL, default=DEFAULT_BACKFILL_PARALLEL): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+    }
+)
+
+FETCH_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CONTRACT): cv.string,
+        vol.Required(ATTR_START): cv.date,
+        vol.Optional(ATTR_END): cv.date,
+        vol.Optional(ATTR_PARALLEL, default=DEFAULT_BACKFILL_PARALLEL): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+    }
+)
+
+
+def _entries_for_call(hass: HomeAssistant, call: ServiceCall) -> list:
+    """Return the loaded entry data dicts targeted by a service call."""
+    entries = {k: v for k, v in hass.data.get(DOMAIN, {}).items() if isinstance(v, dict) and "coordinator" in v}
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None: return list(entries.values())
+    if entry_id not in entries: raise HomeAssistantError(f"Config entry {entry_id} is not loaded.")
+    return [entries[entry_id]]
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+
+    async def async_handle_backfill(call: ServiceCall) -> None:
+        """Start a bulk backfill into long-term statistics."""
+        today = dt_util.now().date()
+        start = months_ago(today, call.data[ATTR_MONTHS])
+        for entry_data in _entries_for_call(hass, call):
+            await entry_data["backfill"].async_start(start, today, call.data[ATTR_PARALLEL])
+
+    async def async_handle_fetch_history(call: ServiceCall) -> ServiceResponse:
+        """Fetch a date range into the hourly history store and report the rows ingested."""
+        today = dt_util.now().date()
+        start = call.data[ATTR_START]; end = min(call.data.get(ATTR_END, today), today)
+        if start > end: raise HomeAssistantError(f"Start date {start} is after end date {end}.")
+        if end - start > timedelta(days=FETCH_HISTORY_MAX_DAYS): raise HomeAssistantError(f"Range longer than {FETCH_HISTORY_MAX_DAYS} days.")
+        contract = call.data.get(ATTR_CONTRACT)
+        targets = []
+        for entry_data in _entries_for_call(hass, call):
+            keys = entry_data["coordinator"].contract_keys
+            if contract is None: targets.extend((entry_data, key) for key in keys)
+            elif contract in keys: targets.append((entry_data, contract))
+        if not targets: raise HomeAssistantError(f"Contract {contract} not found in the loaded entries.")
+        results = []
+        for entry_data, key in targets: # Entries share the request gate; contracts run one after another
+            results.append(await entry_data["backfill"].async_fetch_history(key, start, end, call.data[ATTR_PARALLEL]))
+        return {"results": results}
+
+    hass.services.async_register(DOMAIN, SERVICE_BACKFILL_STATISTICS, async_handle_backfill, schema=BACKFILL_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_FETCH_HISTORY, async_handle_fetch_history,
+        schema=FETCH_HISTORY_SCHEMA, supports_response=SupportsResponse.OPTIONAL,
+    )
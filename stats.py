@@ -0,0 +1,87 @@
+"""Import hourly consumption into Home Assistant long-term statistics."""
+import logging
+from datetime import datetime, timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, NAME
+
+_LOGGER = logging.getLogger(__name__)
+
+# How far before the first stored hour a full import looks for the sum to continue from
+SEED_LOOKBACK = timedelta(days=31)
+
+
+def statistic_id_for(key: str) -> str:
+    """Return the external statistic id for a history series (Energy dashboard water source)."""
+    return f"{DOMAIN}:{slugify(key)}_water_consumption"
+
+
+def build_statistics(rows, base_sum: float = 0.0) -> list:
+    """Turn [(naive local datetime, consumption, reading)] into StatisticData with a running sum."""
+    tz = dt_util.get_default_time_zone()
+    running_sum = base_sum; statistics = []
+    for ts, consumption, reading in rows:
+        if consumption is None: continue
+        running_sum += consumption
+        statistics.append(StatisticData(start=ts.replace(tzinfo=tz), state=reading, sum=running_sum))
+    return statistics
+
+
+async def async_import_statistics(hass: HomeAssistant, coordinator, contract_key: str | None = None, full: bool = False) -> int:
+    """Add a contract's stored hourly rows as external statistics; returns rows imported.
+
+    Incremental by default (continues the sum after the last imported hour); `full`
+    recomputes the whole series, needed after older hours were backfilled. A full import
+    continues the sum of the statistic just before the first stored hour, if any: the
+    hours compaction dropped from the history store keep their statistics.
+    """
+    key = coordinator.history_key(contract_key)
+    statistic_id = statistic_id_for(key)
+    start = None; base_sum = 0.0
+    if not full:
+        last = await get_instance(hass).async_add_executor_job(
+            get_last_statistics, hass, 1, statistic_id, True, {"sum"}
+        )
+        if last.get(statistic_id):
+            last_stat = last[statistic_id][0]
+            last_start = last_stat["start"]
+            if not isinstance(last_start, datetime): last_start = dt_util.utc_from_timestamp(last_start)
+            start = dt_util.as_local(last_start).replace(tzinfo=None) + timedelta(hours=1)
+            base_sum = last_stat.get("sum") or 0.0
+
+    rows = await coordinator.async_get_history(start, contract_key=contract_key)
+    if full and rows: base_sum = await _async_sum_before(hass, statistic_id, rows[0][0])
+    statistics = build_statistics(rows, base_sum)
+    if not statistics: return 0
+
+    metadata = StatisticMetaData(
+        has_mean=False,
+        has_sum=True,
+        name=f"{NAME} {key} consumption",
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement=UnitOfVolume.CUBIC_METERS,
+    )
+    async_add_external_statistics(hass, metadata, statistics)
+    _LOGGER.debug("Imported %d hourly statistics into %s (full=%s).", len(statistics), statistic_id, full)
+    return len(statistics)
+
+
+async def _async_sum_before(hass: HomeAssistant, statistic_id: str, first: datetime) -> float:
+    """Return the sum of the last statistic before `first` (naive local hour), or 0.0."""
+    end = dt_util.as_utc(first.replace(tzinfo=dt_util.get_default_time_zone()))
+    previous = await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, end - SEED_LOOKBACK, end, {statistic_id}, "hour", None, {"sum"}
+    )
+    if not previous.get(statistic_id): return 0.0
+    return previous[statistic_id][-1].get("sum") or 0.0
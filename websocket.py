@@ -0,0 +1,68 @@
+"""Websocket API: hourly history served from the local store instead of state attributes."""
+import logging
+from datetime import timedelta
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import ATTR_CONFIG_ENTRY_ID, DOMAIN
+from .history import to_epoch_hour
+
+_LOGGER = logging.getLogger(__name__)
+
+WS_TYPE_HISTORY = f"{DOMAIN}/history"
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, ws_history)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_HISTORY,
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional("contract"): cv.string,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+    }
+)
+@websocket_api.async_response
+async def ws_history(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Return stored hourly rows as compact columns.
+
+    `hours` are local wall-clock hours since 1970-01-01 (see history.to_epoch_hour);
+    `consumption` and `reading` are parallel lists (m³, null when unknown). Without
+    `start` the last 24 hours up to the newest stored one are returned.
+    """
+    entry_data = hass.data.get(DOMAIN, {}).get(msg[ATTR_CONFIG_ENTRY_ID])
+    if not isinstance(entry_data, dict) or "coordinator" not in entry_data:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not loaded")
+        return
+    coordinator = entry_data["coordinator"]
+    contract = msg.get("contract")
+    if contract is not None and contract not in coordinator.contract_keys:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Unknown contract {contract}")
+        return
+
+    start = dt_util.as_local(msg["start"]).replace(tzinfo=None) if "start" in msg else None
+    end = dt_util.as_local(msg["end"]).replace(tzinfo=None) if "end" in msg else None
+    if start is None:
+        series = coordinator.api.series.get(contract if contract is not None else coordinator.contract_keys[0])
+        mark = series.high_water_mark if series else None
+        if mark is None:
+            connection.send_result(msg["id"], {"hours": [], "consumption": [], "reading": []})
+            return
+        end = end or mark + timedelta(hours=1)
+        start = end - timedelta(hours=24)
+    rows = await coordinator.async_get_history(start, end, contract)
+    connection.send_result(msg["id"], {
+        "hours": [to_epoch_hour(ts) for ts, _, _ in rows],
+        "consumption": [consumption for _, consumption, _ in rows],
+        "reading": [reading for _, _, reading in rows],
+    })